@@ -0,0 +1,36 @@
+"""Настройка соединений SQLite при их открытии.
+
+PRAGMA из SQLITE_PRAGMAS выполняются для каждого нового соединения с
+базой SQLite. WAL позволяет читателям не ждать писателя, а busy_timeout
+заставляет писателей ждать освобождения блокировки вместо немедленной
+ошибки "database is locked".
+"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+# PRAGMA, которые разрешено задавать в настройках
+SUPPORTED_PRAGMAS = {
+    'journal_mode',
+    'synchronous',
+    'mmap_size',
+    'cache_size',
+    'busy_timeout',
+    'temp_store',
+    'foreign_keys',
+}
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    unknown = set(pragmas) - SUPPORTED_PRAGMAS
+    if unknown:
+        raise ImproperlyConfigured(
+            'Неизвестные PRAGMA в SQLITE_PRAGMAS: {}'.format(
+                ', '.join(sorted(unknown))
+            )
+        )
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,118 @@
+"""Профилирование отдельных запросов персонала по требованию.
+
+Запрос с заголовком X-Profile: 1 или параметром ?__profile=1 от
+сотрудника выполняется под сэмплирующим профилировщиком: фоновый поток
+каждые PROFILER_INTERVAL секунд снимает стек потока запроса. Результат
+записывается в PROFILER_DIR в формате collapsed stacks ("a;b;c 12"),
+который принимают flamegraph.pl и speedscope. Один сотрудник может
+профилировать не чаще раза в PROFILER_RATE_LIMIT секунд.
+
+Без триггера middleware только проверяет заголовок и параметр запроса;
+при PROFILER_DIR = None оно вообще исключается из цепочки.
+"""
+import os
+import re
+import sys
+import threading
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils import timezone
+
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_PARAM = '__profile'
+RATE_LIMIT_KEY = 'core:profile:{}'
+
+
+def frame_name(code):
+    filename = os.path.relpath(code.co_filename, settings.BASE_DIR)
+    return f'{code.co_name} ({filename}:{code.co_firstlineno})'
+
+
+def collapse(frame):
+    """Стек кадра строкой collapsed stacks: от корня к вершине через ;."""
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame.f_code).replace(';', ':'))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class StackSampler:
+    """Снимает стеки потока thread_id, пока открыт контекст."""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join()
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as target:
+            for stack, count in self.stacks.most_common():
+                target.write(f'{stack} {count}\n')
+
+
+def requested(request):
+    return (
+        request.META.get(PROFILE_HEADER) == '1'
+        or request.GET.get(PROFILE_PARAM) == '1'
+    )
+
+
+def profile_name(request):
+    match = request.resolver_match
+    label = match.view_name if match is not None else request.path
+    label = re.sub(r'[^\w.-]+', '-', label).strip('-') or 'root'
+    stamp = timezone.now().strftime('%Y%m%d-%H%M%S')
+    return f'{stamp}-{label}-{uuid.uuid4().hex[:8]}.collapsed'
+
+
+class ProfilerMiddleware:
+    """Профилирует запросы сотрудников, попросивших об этом."""
+
+    def __init__(self, get_response):
+        if not settings.PROFILER_DIR:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not requested(request) or not request.user.is_staff:
+            return self.get_response(request)
+        if not cache.add(
+            RATE_LIMIT_KEY.format(request.user.pk), True,
+            settings.PROFILER_RATE_LIMIT,
+        ):
+            response = self.get_response(request)
+            response['X-Profile'] = 'rate-limited'
+            return response
+
+        sampler = StackSampler(
+            threading.get_ident(), settings.PROFILER_INTERVAL
+        )
+        with sampler:
+            response = self.get_response(request)
+        os.makedirs(settings.PROFILER_DIR, exist_ok=True)
+        name = profile_name(request)
+        sampler.write(os.path.join(settings.PROFILER_DIR, name))
+        response['X-Profile'] = name
+        return response
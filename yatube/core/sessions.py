@@ -0,0 +1,11 @@
+"""Хранилище сессий в базе, отмечающее загрузку фазой session."""
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+
+from .timing import phase
+
+
+class SessionStore(DBStore):
+
+    def load(self):
+        with phase('session'):
+            return super().load()
@@ -0,0 +1,179 @@
+"""Время фаз обработки запроса: SQL, шаблоны, миниатюры, сессия.
+
+ServerTimingMiddleware собирает фазы текущего запроса и пишет их в строку
+журнала доступа (logger core.access, JSON), а персоналу - ещё и в
+заголовок Server-Timing. Фазы отмечают точки расширения из настроек:
+бэкенд шаблонов TimedDjangoTemplates, бэкенд миниатюр
+posts.thumbnails.ThumbnailBackend и хранилище сессий core.sessions.
+Фазы могут быть вложены: время шаблона включает миниатюры и SQL,
+выполненные при его отрисовке. У потоковых ответов учитывается только
+время до начала передачи тела. Сам middleware не загружает ни сессию,
+ни пользователя: берёт их, только если это уже сделало представление.
+"""
+import json
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.contrib.auth import SESSION_KEY, get_user_model
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+from django.utils.functional import SimpleLazyObject, empty
+
+
+logger = logging.getLogger('core.access')
+
+# Порядок фаз в заголовке и журнале
+PHASES = ('sql', 'template', 'thumbnail', 'session')
+
+_timings = ContextVar('request_timings', default=None)
+
+
+class Timings:
+    """Суммарное время и число вызовов каждой фазы запроса."""
+
+    def __init__(self):
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.counts = dict.fromkeys(PHASES, 0)
+
+    def add(self, name, seconds):
+        self.seconds[name] += seconds
+        self.counts[name] += 1
+
+
+@contextmanager
+def phase(name):
+    """Засчитывает время блока в фазу name текущего запроса."""
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+
+class QueryTimer:
+    """Обёртка execute: считает SQL-запросы и их суммарное время."""
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.queries += 1
+
+
+def _record_query(execute, sql, params, many, context):
+    with phase('sql'):
+        return execute(sql, params, many, context)
+
+
+class TimedTemplate(Template):
+
+    def render(self, context=None, request=None):
+        with phase('template'):
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Бэкенд шаблонов Django, отмечающий отрисовку фазой template.
+
+    Отмечаются только шаблоны верхнего уровня: {% include %} и
+    {% extends %} отрисовываются внутри них.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(
+            super().get_template(template_name).template, self
+        )
+
+
+def server_timing(timings, total):
+    """Значение заголовка Server-Timing, длительности в миллисекундах."""
+    metrics = [
+        f'{name};dur={timings.seconds[name] * 1000:.1f};'
+        f'desc="{timings.counts[name]}"'
+        for name in PHASES
+        if timings.counts[name]
+    ]
+    metrics.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(metrics)
+
+
+def loaded_user(request):
+    """Пользователь запроса, если его уже загрузило само представление.
+
+    request.user ленивый: обращение к нему читает сессию и пользователя
+    из базы, чего, например, страницы из кэша не делают.
+    """
+    user = getattr(request, 'user', None)
+    if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+        return None
+    return user
+
+
+def user_id(request):
+    """id пользователя из уже загруженных пользователя или сессии."""
+    user = loaded_user(request)
+    if user is not None:
+        return user.pk
+    session = getattr(request, 'session', None)
+    if session is None or not hasattr(session, '_session_cache'):
+        return None
+    pk = session.get(SESSION_KEY)
+    if pk is None:
+        return None
+    return get_user_model()._meta.pk.to_python(pk)
+
+
+class ServerTimingMiddleware:
+    """Замеряет фазы запроса, пишет журнал доступа и Server-Timing."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = Timings()
+        token = _timings.set(timings)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(_record_query)
+                    )
+                response = self.get_response(request)
+        finally:
+            _timings.reset(token)
+        total = time.perf_counter() - started
+
+        user = loaded_user(request)
+        if user is not None and user.is_staff:
+            response['Server-Timing'] = server_timing(timings, total)
+        match = request.resolver_match
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'view': match.view_name if match is not None else None,
+            'user': user_id(request),
+            'duration_ms': round(total * 1000, 1),
+            **{
+                f'{name}_ms': round(timings.seconds[name] * 1000, 1)
+                for name in PHASES
+            },
+            'queries': timings.counts['sql'],
+        }, ensure_ascii=False))
+        return response
@@ -1,5 +1,9 @@
 from django.contrib import admin
+from django.db.models.expressions import RawSQL
+
 from .models import Group, Post
+from .search import (is_supported as search_is_supported, match_expression,
+                     matching_ids_sql)
 # Register your models here.
 
 
@@ -17,6 +21,17 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по тексту через индекс FTS5 вместо LIKE '%...%'."""
+        if not search_term or not search_is_supported(queryset.db):
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        if not match_expression(search_term):
+            return queryset.none(), False
+        sql, params = matching_ids_sql(search_term)
+        return queryset.filter(pk__in=RawSQL(sql, params)), False
+
 
 @admin.register(Group)
 class GroupAdmin(admin.ModelAdmin):
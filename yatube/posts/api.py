@@ -0,0 +1,174 @@
+"""JSON API только для чтения: ленты и отдельный пост.
+
+Каждая страница ленты - один запрос: values() с присоединёнными автором
+и группой, без создания экземпляров моделей. Пагинация курсорная
+(?cursor=), набор полей задаётся через ?fields=id,text,author.
+"""
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from .models import Group, Post, User
+from .paginators import CursorPaginator, InvalidCursor
+from .routers import read_from_replica
+
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 100
+
+# Поле ответа -> выражение для values()
+FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'updated_at': 'updated_at',
+    'author': 'author__username',
+    'author_name': 'author__first_name',
+    'author_surname': 'author__last_name',
+    'group': 'group__slug',
+    'group_title': 'group__title',
+    'image': 'image',
+    'image_width': 'image_width',
+    'image_height': 'image_height',
+    'image_placeholder': 'image_placeholder',
+}
+DEFAULT_FIELDS = (
+    'id', 'text', 'pub_date', 'author', 'group', 'image',
+)
+# Нужны курсору независимо от запрошенных полей
+CURSOR_FIELDS = ('id', 'pub_date')
+
+
+class BadRequest(Exception):
+    """Некорректные параметры запроса к API."""
+
+
+def json_response(data, status=200):
+    # Кириллица без \u-экранирования почти вдвое короче
+    return JsonResponse(
+        data, status=status, json_dumps_params={'ensure_ascii': False}
+    )
+
+
+def error(message, status):
+    return json_response({'error': message}, status=status)
+
+
+def requested_fields(request):
+    value = request.GET.get('fields')
+    if not value:
+        return DEFAULT_FIELDS
+    fields = tuple(dict.fromkeys(
+        field.strip() for field in value.split(',') if field.strip()
+    ))
+    unknown = [field for field in fields if field not in FIELDS]
+    if unknown or not fields:
+        raise BadRequest(
+            'Неизвестные поля: {}. Доступны: {}'.format(
+                ', '.join(unknown), ', '.join(FIELDS)
+            )
+        )
+    return fields
+
+
+def requested_limit(request):
+    value = request.GET.get('limit')
+    if value is None:
+        return DEFAULT_LIMIT
+    try:
+        limit = int(value)
+    except ValueError:
+        raise BadRequest('limit должен быть числом')
+    if not 1 <= limit <= MAX_LIMIT:
+        raise BadRequest(f'limit должен быть от 1 до {MAX_LIMIT}')
+    return limit
+
+
+def rows(query_set, fields):
+    """values() для полей ответа и полей курсора."""
+    lookups = dict.fromkeys(
+        FIELDS[field] for field in fields + CURSOR_FIELDS
+    )
+    return query_set.order_by().values(*lookups)
+
+
+def serialize(row, fields):
+    image_storage = Post._meta.get_field('image').storage
+    data = {}
+    for field in fields:
+        value = row[FIELDS[field]]
+        if field == 'image':
+            value = image_storage.url(value) if value else None
+        data[field] = value
+    return data
+
+
+def page_url(request, cursor):
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return request.build_absolute_uri(f'{request.path}?{params.urlencode()}')
+
+
+def feed_response(request, query_set, exists=None):
+    """Страница ленты в JSON.
+
+    exists - проверка, что владелец ленты существует; выполняется только
+    для пустой первой страницы, чтобы ответить 404.
+    """
+    try:
+        fields = requested_fields(request)
+        limit = requested_limit(request)
+        page = CursorPaginator(rows(query_set, fields), limit).page(
+            request.GET.get('cursor')
+        )
+    except BadRequest as bad_request:
+        return error(str(bad_request), 400)
+    except InvalidCursor:
+        return error('Некорректный курсор', 400)
+    if not page and exists is not None and not exists():
+        return error('Не найдено', 404)
+    return json_response({
+        'results': [serialize(row, fields) for row in page],
+        'next': page_url(request, page.next_cursor),
+        'previous': page_url(request, page.previous_cursor),
+    })
+
+
+@read_from_replica
+@require_GET
+def post_list(request):
+    return feed_response(request, Post.objects.all())
+
+
+@read_from_replica
+@require_GET
+def group_post_list(request, slug):
+    return feed_response(
+        request,
+        Post.objects.filter(group__slug=slug),
+        exists=Group.objects.filter(slug=slug).exists,
+    )
+
+
+@read_from_replica
+@require_GET
+def author_post_list(request, username):
+    return feed_response(
+        request,
+        Post.objects.filter(author__username=username),
+        exists=User.objects.filter(username=username).exists,
+    )
+
+
+@read_from_replica
+@require_GET
+def post_detail(request, post_id):
+    try:
+        fields = requested_fields(request)
+    except BadRequest as bad_request:
+        return error(str(bad_request), 400)
+    row = rows(Post.objects.filter(pk=post_id), fields).first()
+    if row is None:
+        return error('Не найдено', 404)
+    return json_response(serialize(row, fields))
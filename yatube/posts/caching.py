@@ -0,0 +1,226 @@
+"""Кэш страниц для анонимных посетителей на счётчиках поколений."""
+import hashlib
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from .routers import primary_reads
+
+
+GLOBAL_SCOPE = 'global'
+GENERATION_KEY = 'posts:generation:{}'
+PAGE_KEY = 'posts:page:{}'
+
+
+def group_scope(group_id):
+    return f'group:{group_id}' if group_id is not None else None
+
+
+def author_scope(author_id):
+    return f'author:{author_id}' if author_id is not None else None
+
+
+def username_scope(username):
+    """Страницы по имени пользователя: имя может достаться другому."""
+    return f'username:{username}' if username else None
+
+
+def post_scope(post_id):
+    return f'post:{post_id}' if post_id is not None else None
+
+
+def _new_generation():
+    # Поколение - время изменения области в наносекундах: по нему
+    # считается Last-Modified (см. conditional), а начатое заново
+    # (например, после вытеснения ключа) не совпадёт с сохранённым ранее
+    return time.time_ns()
+
+
+def generations_shared():
+    """Видят ли все процессы сервера одни и те же поколения.
+
+    У LocMemCache кэш свой в каждом процессе: валидаторы по его
+    поколениям в другом процессе устарели бы навсегда.
+    """
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def get_generations(scopes):
+    """Текущие поколения областей; недостающие создаются."""
+    keys = {GENERATION_KEY.format(scope): scope for scope in scopes}
+    found = cache.get_many(keys)
+    for key in keys.keys() - found.keys():
+        cache.add(key, _new_generation(), timeout=None)
+        found[key] = cache.get(key)
+    return {keys[key]: generation for key, generation in found.items()}
+
+
+def _bump(scopes):
+    keys = [GENERATION_KEY.format(scope) for scope in scopes]
+    current = cache.get_many(keys)
+    now = _new_generation()
+    # Поколение только растёт, даже если часы процессов расходятся
+    cache.set_many(
+        {key: max(now, current.get(key, 0) + 1) for key in keys},
+        timeout=None,
+    )
+
+
+def bump_generations(*scopes):
+    """Инвалидирует страницы, зависящие от областей scopes.
+
+    Поколения меняются сразу и ещё раз после коммита транзакции, чтобы
+    не осталась страница, собранная по данным до коммита.
+    """
+    scopes = [scope for scope in scopes if scope is not None]
+    _bump(scopes)
+    transaction.on_commit(lambda: _bump(scopes))
+
+
+def depends_on(request, *scopes):
+    """Отмечает, что кэшируемая страница зависит от областей scopes."""
+    generations = getattr(request, '_page_cache_generations', None)
+    if generations is not None:
+        generations.update(
+            get_generations(scope for scope in scopes if scope is not None)
+        )
+
+
+def _page_key(request):
+    path = request.get_full_path().encode()
+    return PAGE_KEY.format(hashlib.md5(path).hexdigest())
+
+
+def cache_anonymous_page(view):
+    """Кэширует ответы view для анонимных GET-запросов."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'GET' or request.user.is_authenticated:
+            return view(request, *args, **kwargs)
+
+        key = _page_key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            generations, response = entry
+            if get_generations(generations) == generations:
+                # Валидаторы сохранены вместе с ответом: 304 без запросов
+                return get_conditional_response(
+                    request,
+                    etag=response.get('ETag'),
+                    last_modified=parse_http_date_safe(
+                        response.get('Last-Modified', '')
+                    ),
+                    response=response,
+                )
+
+        request._page_cache_generations = {}
+        # Страница для кэша не должна отставать от поколений, под
+        # которыми сохраняется
+        with primary_reads():
+            response = view(request, *args, **kwargs)
+        generations = request._page_cache_generations
+        if (
+            generations
+            and response.status_code == 200
+            and not response.cookies
+        ):
+            cache.set(
+                key,
+                (generations, response),
+                settings.POSTS_PAGE_CACHE_TIMEOUT,
+            )
+        return response
+    return wrapper
+
+
+FRAGMENT_KEY = 'posts:card:{variant}:{pk}:{version}:{author}:{group}'
+FRAGMENT_STATS_KEY = 'posts:card-stats:{}'
+
+
+def author_data_scope(author_id):
+    """Данные самого автора (имя), без его постов."""
+    return f'author-data:{author_id}' if author_id is not None else None
+
+
+def group_data_scope(group_id):
+    """Данные самой группы (название, slug), без её постов."""
+    return f'group-data:{group_id}' if group_id is not None else None
+
+
+def card_scopes(post):
+    return [
+        scope
+        for scope in (
+            author_data_scope(post.author_id), group_data_scope(post.group_id)
+        )
+        if scope is not None
+    ]
+
+
+def prefetch_card_versions(request, posts):
+    """Загружает версии авторов и групп карточек posts одним get_many."""
+    versions = getattr(request, '_card_versions', {})
+    versions.update(get_generations(
+        {scope for post in posts for scope in card_scopes(post)}
+    ))
+    request._card_versions = versions
+
+
+def post_card_key(post, variant, request=None):
+    """Ключ фрагмента карточки поста.
+
+    Меняется вместе с updated_at поста и с версиями его автора и группы,
+    которые выводятся в карточке. Версии берутся из загруженных
+    prefetch_card_versions, недостающие запрашиваются у кэша.
+    """
+    scopes = card_scopes(post)
+    versions = getattr(request, '_card_versions', {})
+    if any(scope not in versions for scope in scopes):
+        versions = {**versions, **get_generations(scopes)}
+        if request is not None:
+            request._card_versions = versions
+    return FRAGMENT_KEY.format(
+        variant=variant,
+        pk=post.pk,
+        version=post.updated_at.timestamp(),
+        author=versions[author_data_scope(post.author_id)],
+        group=versions.get(group_data_scope(post.group_id), ''),
+    )
+
+
+def count_fragment(hit):
+    """Учитывает попадание или промах в доле рендеров карточек.
+
+    Доля задаётся POSTS_FRAGMENT_STATS_RATE. Так счётчик в общем кэше
+    не увеличивается на каждой карточке, а доля попаданий от выборки не
+    меняется.
+    """
+    if random.random() >= settings.POSTS_FRAGMENT_STATS_RATE:
+        return
+    key = FRAGMENT_STATS_KEY.format('hits' if hit else 'misses')
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+def fragment_stats():
+    """Попадания и промахи кэша карточек в выборке с последнего сброса."""
+    keys = {FRAGMENT_STATS_KEY.format(name): name
+            for name in ('hits', 'misses')}
+    values = cache.get_many(keys)
+    return {name: values.get(key, 0) for key, name in keys.items()}
+
+
+def reset_fragment_stats():
+    cache.delete_many(
+        [FRAGMENT_STATS_KEY.format(name) for name in ('hits', 'misses')]
+    )
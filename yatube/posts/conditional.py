@@ -0,0 +1,93 @@
+"""Условные GET-запросы (ETag / Last-Modified) для лент и постов."""
+import hashlib
+from collections import namedtuple
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .caching import generations_shared, get_generations
+from .routers import used_replica
+
+
+# count - известное заранее число постов страницы или None
+PageState = namedtuple('PageState', ['object', 'count', 'scopes'])
+
+
+def page_state(request, load_state, *args, **kwargs):
+    """Состояние страницы от load_state, вычисляемое раз за запрос."""
+    state = getattr(request, '_page_state', None)
+    if state is None:
+        state = load_state(*args, **kwargs)
+        request._page_state = state
+    return state
+
+
+def state_generations(state):
+    return get_generations(
+        scope for scope in state.scopes if scope is not None
+    )
+
+
+def generations_modified(generations):
+    """Время последнего изменения областей по их поколениям."""
+    return datetime.fromtimestamp(
+        max(generations.values()) / 10 ** 9, tz=timezone.utc
+    )
+
+
+def page_etag(request, generations):
+    parts = [str(request.user.pk)]
+    parts.extend(
+        f'{scope}={generations[scope]}' for scope in sorted(generations)
+    )
+    return hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+
+def conditional_page(load_state):
+    """Отвечает 304 на GET, если страница не менялась.
+
+    load_state(*args, **kwargs) получает аргументы view и возвращает
+    PageState или бросает Http404.
+    """
+    def generations(request, *args, **kwargs):
+        # Поколения читаются раз за запрос: ETag и Last-Modified должны
+        # описывать одно и то же состояние
+        if not hasattr(request, '_state_generations'):
+            request._state_generations = state_generations(
+                page_state(request, load_state, *args, **kwargs)
+            )
+        return request._state_generations
+
+    def etag(request, *args, **kwargs):
+        return page_etag(request, generations(request, *args, **kwargs))
+
+    def last_modified(request, *args, **kwargs):
+        return generations_modified(generations(request, *args, **kwargs))
+
+    def decorator(view):
+        conditional_view = condition(etag, last_modified)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not generations_shared():
+                # Поколения другого процесса могут быть новее: без
+                # валидаторов
+                response = view(request, *args, **kwargs)
+            else:
+                response = conditional_view(request, *args, **kwargs)
+            if used_replica():
+                # Поколения уже новые, а реплика могла отстать: с такими
+                # валидаторами браузер хранил бы старую страницу как свежую
+                del response['ETag']
+                del response['Last-Modified']
+            # Без no-cache браузер сочтёт страницу свежей по Last-Modified
+            # и не придёт за обновлением
+            if request.user.is_authenticated:
+                patch_cache_control(response, no_cache=True, private=True)
+            else:
+                patch_cache_control(response, no_cache=True)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,193 @@
+"""Потоковая выгрузка постов, групп и пользователей в JSONL и CSV.
+
+Строки читаются через values().iterator(chunk_size=...) с присоединёнными
+автором и группой и сразу превращаются в текст, поэтому память не
+зависит от размера таблицы. Формат постов совпадает с входным форматом
+import_posts. Выгрузку можно продолжать с места прошлой: since - это id
+последней выгруженной записи или дата, после которой нужны записи.
+"""
+import csv
+import zlib
+from datetime import datetime
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_GET
+
+from .models import Group, Post, User
+
+
+# Формат -> тип содержимого ответа
+FORMATS = {
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+CHUNK_SIZE = 2000
+# Размер частей, которыми текст уходит в файл или ответ
+BUFFER_SIZE = 64 * 1024
+
+
+class Export:
+    """Выгружаемая таблица: поля ответа и поле даты для since."""
+
+    def __init__(self, model, fields, date_field=None):
+        self.model = model
+        self.fields = fields
+        self.date_field = date_field
+
+    def rows(self, since=None, chunk_size=CHUNK_SIZE):
+        query_set = self.model.objects.all()
+        order = ['id']
+        if isinstance(since, int):
+            query_set = query_set.filter(id__gt=since)
+        elif since is not None:
+            if self.date_field is None:
+                raise ValueError('Для этой таблицы since - только id')
+            query_set = query_set.filter(
+                **{f'{self.date_field}__gt': since}
+            )
+            order = [self.date_field, 'id']
+        return (
+            query_set.order_by(*order)
+            .values_list(*self.fields.values())
+            .iterator(chunk_size=chunk_size)
+        )
+
+
+EXPORTS = {
+    'posts': Export(
+        Post,
+        {
+            'id': 'id',
+            'text': 'text',
+            'pub_date': 'pub_date',
+            'updated_at': 'updated_at',
+            'author': 'author__username',
+            'group': 'group__slug',
+            'image': 'image',
+            'image_width': 'image_width',
+            'image_height': 'image_height',
+            'image_size': 'image_size',
+        },
+        date_field='pub_date',
+    ),
+    'groups': Export(
+        Group,
+        {
+            'id': 'id',
+            'slug': 'slug',
+            'title': 'title',
+            'description': 'description',
+            'posts_count': 'posts_count',
+            'last_post_at': 'last_post_at',
+        },
+    ),
+    'users': Export(
+        User,
+        {
+            'id': 'id',
+            'username': 'username',
+            'first_name': 'first_name',
+            'last_name': 'last_name',
+            'date_joined': 'date_joined',
+            'posts_count': 'post_stats__posts_count',
+        },
+        date_field='date_joined',
+    ),
+}
+
+
+def parse_since(value):
+    """id (число) или дата из параметра since; ValueError при ошибке."""
+    if not value:
+        return None
+    if value.isdigit():
+        return int(value)
+    since = parse_datetime(value)
+    if since is None:
+        raise ValueError(f'since должен быть id или датой ISO 8601: {value}')
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return '' if value is None else value
+
+
+class _Line:
+    """Файлоподобный объект, который отдаёт записанную csv строку."""
+
+    def write(self, value):
+        return value
+
+
+def lines(name, export_format, since=None, chunk_size=CHUNK_SIZE):
+    """Строки выгрузки таблицы name в формате export_format."""
+    export = EXPORTS[name]
+    names = list(export.fields)
+    rows = export.rows(since, chunk_size)
+    if export_format == 'csv':
+        writer = csv.writer(_Line())
+        yield writer.writerow(names)
+        for row in rows:
+            yield writer.writerow([_plain(value) for value in row])
+        return
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(names, row))) + '\n'
+
+
+def buffered(parts, size=BUFFER_SIZE):
+    """Склеивает мелкие строки в части примерно по size символов."""
+    buffer = []
+    length = 0
+    for part in parts:
+        buffer.append(part)
+        length += len(part)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer = []
+            length = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def gzipped(parts):
+    """Сжимает поток текстовых частей в gzip по мере чтения."""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for part in parts:
+        data = compressor.compress(part.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+@require_GET
+@staff_member_required
+def export(request, name):
+    """Выгрузка таблицы для персонала: ?format=csv&since=...&gzip=1."""
+    export_format = request.GET.get('format', 'jsonl')
+    if name not in EXPORTS or export_format not in FORMATS:
+        return HttpResponseBadRequest('Неизвестная таблица или формат')
+    try:
+        since = parse_since(request.GET.get('since'))
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+    if isinstance(since, datetime) and EXPORTS[name].date_field is None:
+        return HttpResponseBadRequest('Для этой таблицы since - только id')
+    filename = f'{name}.{export_format}'
+    content = buffered(lines(name, export_format, since))
+    content_type = FORMATS[export_format]
+    if request.GET.get('gzip'):
+        content = gzipped(content)
+        filename += '.gz'
+        content_type = 'application/gzip'
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,149 @@
+"""Потоковые Atom-ленты: общая, группы и автора."""
+import hashlib
+from xml.sax.saxutils import escape, quoteattr
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import rfc3339_date
+from django.utils.http import http_date
+from django.views.decorators.http import require_GET
+
+from .caching import generations_shared, get_generations
+from .conditional import generations_modified, state_generations
+from .models import Post
+from .views import group_state, index_state, profile_state
+
+
+FEED_STATE_KEY = 'posts:feed:{}'
+FEED_CONTENT_TYPE = 'application/atom+xml; charset=utf-8'
+ENTRY_TITLE_LENGTH = 50
+ITERATOR_CHUNK_SIZE = 100
+
+
+def feed_state(name, load_state, *args):
+    """PageState ленты и поколения её областей.
+
+    Состояние берётся из кэша, если поколения не изменились, иначе
+    загружается load_state(*args).
+    """
+    key = FEED_STATE_KEY.format(
+        hashlib.md5('|'.join((name,) + args).encode()).hexdigest()
+    )
+    entry = cache.get(key)
+    if entry is not None:
+        generations, state = entry
+        if get_generations(generations) == generations:
+            return state, generations
+    state = load_state(*args)
+    generations = state_generations(state)
+    cache.set(
+        key, (generations, state), settings.POSTS_PAGE_CACHE_TIMEOUT
+    )
+    return state, generations
+
+
+def entry_title(text):
+    first_line = text.strip().split('\n', 1)[0]
+    if len(first_line) > ENTRY_TITLE_LENGTH:
+        return first_line[:ENTRY_TITLE_LENGTH].rstrip() + '…'
+    return first_line
+
+
+def atom_chunks(request, title, link, updated, posts):
+    """Части Atom-документа: заголовок, по одной записи, окончание."""
+    feed_url = request.build_absolute_uri()
+    yield (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom" xml:lang="ru">'
+        f'<title>{escape(title)}</title>'
+        f'<link href={quoteattr(request.build_absolute_uri(link))} '
+        'rel="alternate"/>'
+        f'<link href={quoteattr(feed_url)} rel="self"/>'
+        f'<id>{escape(feed_url)}</id>'
+        f'<updated>{rfc3339_date(updated)}</updated>'
+    )
+    for post in posts:
+        url = request.build_absolute_uri(
+            reverse('posts:post_detail', args=[post.pk])
+        )
+        author = post.author.get_full_name() or post.author.username
+        category = ''
+        if post.group is not None:
+            category = (
+                f'<category term={quoteattr(post.group.slug)} '
+                f'label={quoteattr(post.group.title)}/>'
+            )
+        yield (
+            '<entry>'
+            f'<title>{escape(entry_title(post.text))}</title>'
+            f'<link href={quoteattr(url)} rel="alternate"/>'
+            f'<id>{escape(url)}</id>'
+            f'<published>{rfc3339_date(post.pub_date)}</published>'
+            f'<updated>{rfc3339_date(post.updated_at)}</updated>'
+            f'<author><name>{escape(author)}</name></author>'
+            f'{category}'
+            f'<content type="text">{escape(post.text)}</content>'
+            '</entry>'
+        )
+    yield '</feed>\n'
+
+
+def atom_response(request, generations, title, link, posts):
+    updated = generations_modified(generations)
+    last_modified = None
+    if generations_shared():
+        last_modified = int(updated.timestamp())
+        not_modified = get_conditional_response(
+            request, last_modified=last_modified
+        )
+        if not_modified is not None:
+            return not_modified
+    posts = (
+        posts.select_related('author', 'group')
+        .order_by('-pub_date', '-id')[:settings.POSTS_FEED_SIZE]
+        .iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+    )
+    response = StreamingHttpResponse(
+        atom_chunks(request, title, link, updated, posts),
+        content_type=FEED_CONTENT_TYPE,
+    )
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+@require_GET
+def index_feed(request):
+    _, generations = feed_state('index', index_state)
+    return atom_response(
+        request, generations, 'Последние записи', reverse('posts:index'),
+        Post.objects.all(),
+    )
+
+
+@require_GET
+def group_feed(request, slug):
+    state, generations = feed_state('group', group_state, slug)
+    group = state.object
+    return atom_response(
+        request, generations, f'Записи сообщества {group.title}',
+        reverse('posts:groups', args=[group.slug]),
+        Post.objects.filter(group=group),
+    )
+
+
+@require_GET
+def author_feed(request, username):
+    # В областях profile_state есть и имя: удаление пользователя или
+    # новый владелец имени сбрасывают сохранённое состояние с User
+    state, generations = feed_state('author', profile_state, username)
+    author = state.object
+    return atom_response(
+        request, generations,
+        f'Записи пользователя {author.get_full_name() or author.username}',
+        reverse('posts:profile', args=[author.username]),
+        Post.objects.filter(author=author),
+    )
@@ -0,0 +1,185 @@
+"""Приём картинок постов с ограниченным расходом памяти.
+
+Размер картинки читается из заголовка без декодирования пикселей.
+Слишком большие по числу пикселей файлы отклоняются ещё до декодирования,
+поэтому память на одну загрузку ограничена POSTS_IMAGE_MAX_PIXELS.
+Картинки крупнее POSTS_IMAGE_MAX_SIZE уменьшаются: JPEG декодируется
+сразу в уменьшенном масштабе (draft), остальные форматы - целиком, но
+уменьшаются до поворота по EXIF, так что полноразмерная копия не
+создаётся. EXIF удаляется при перекодировании, ориентация из него
+применяется. Анимированные картинки не перекодируются: больше
+POSTS_IMAGE_MAX_SIZE они отклоняются, меньше - принимаются как есть.
+"""
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image, ImageOps
+
+
+# До какого размера декодируется картинка ради цвета-заглушки
+PLACEHOLDER_DRAFT_SIZE = (64, 64)
+
+# Тег EXIF с ориентацией и её значения с поворотом на 90°
+ORIENTATION = 0x0112
+TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+# Формат Pillow: (расширение, content type)
+SAVE_FORMATS = {
+    'JPEG': ('jpg', 'image/jpeg'),
+    'PNG': ('png', 'image/png'),
+    'GIF': ('gif', 'image/gif'),
+    'WEBP': ('webp', 'image/webp'),
+}
+
+
+def _save_format(image):
+    # MPO и прочие производные JPEG сохраняем как обычный JPEG
+    if image.format in SAVE_FORMATS:
+        return image.format
+    return 'JPEG'
+
+
+def _placeholder(image):
+    """Средний цвет картинки; JPEG декодируется в уменьшенном масштабе."""
+    image.draft('RGB', PLACEHOLDER_DRAFT_SIZE)
+    red, green, blue = (
+        image.convert('RGB').resize((1, 1), Image.BOX).getpixel((0, 0))
+    )
+    return f'#{red:02x}{green:02x}{blue:02x}'
+
+
+def _reencode(image, max_size):
+    """Формат, байты, размер и цвет-заглушка картинки в max_size без EXIF."""
+    save_format = _save_format(image)
+    if image.getexif().get(ORIENTATION) in TRANSPOSED_ORIENTATIONS:
+        # После поворота ширина и высота поменяются местами
+        max_size = max_size[::-1]
+    # Уменьшаем до поворота, чтобы exif_transpose копировал уже маленькую
+    # картинку: JPEG декодируется в уменьшенном масштабе (draft), остальные
+    # форматы уменьшаются сразу после декодирования
+    image.draft(image.mode, max_size)
+    image.thumbnail(max_size)
+    result = ImageOps.exif_transpose(image)
+    try:
+        if save_format == 'JPEG' and result.mode not in ('RGB', 'L'):
+            result = result.convert('RGB')
+        buffer = BytesIO()
+        # exif не передаётся в save(), поэтому в файл он не попадает
+        result.save(
+            buffer,
+            format=save_format,
+            quality=settings.POSTS_IMAGE_QUALITY,
+        )
+        return (
+            save_format, buffer.getvalue(), result.size, _placeholder(result)
+        )
+    finally:
+        result.close()
+
+
+def _metadata(size, file_size, placeholder):
+    width, height = size
+    return {
+        'image_width': width,
+        'image_height': height,
+        'image_size': file_size,
+        'image_placeholder': placeholder,
+    }
+
+
+def _keep_upload(upload, image):
+    """Исходный файл с метаданными картинки."""
+    size = image.size
+    try:
+        placeholder = _placeholder(image)
+    except (Image.DecompressionBombError, OSError):
+        raise ValidationError(
+            'Не удалось прочитать изображение', code='invalid_image'
+        )
+    # image.close() закрыл бы и сам файл загрузки
+    upload.seek(0)
+    upload.image_metadata = _metadata(size, upload.size, placeholder)
+    return upload
+
+
+def ingest_image(upload):
+    """Проверяет загруженную картинку и при необходимости уменьшает её.
+
+    Возвращает исходный файл, если его не нужно менять, или новый файл
+    с уменьшенной картинкой без EXIF. В атрибуте image_metadata файла -
+    размеры и цвет-заглушка, посчитанные по уже открытой картинке, их
+    берёт сигнал pre_save поста. Бросает ValidationError для
+    повреждённых файлов и декомпрессионных бомб.
+    """
+    upload.seek(0)
+    try:
+        image = Image.open(upload)
+    except (Image.DecompressionBombError, OSError):
+        raise ValidationError(
+            'Не удалось прочитать изображение', code='invalid_image'
+        )
+
+    width, height = image.size
+    if width * height > settings.POSTS_IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Изображение слишком большое: %(width)s×%(height)s пикселей',
+            code='too_many_pixels',
+            params={'width': width, 'height': height},
+        )
+
+    max_size = settings.POSTS_IMAGE_MAX_SIZE
+    oversized = width > max_size[0] or height > max_size[1]
+    if getattr(image, 'is_animated', False):
+        # Перекодирование сохранило бы только первый кадр, поэтому
+        # анимация не уменьшается и не очищается от EXIF
+        if oversized:
+            raise ValidationError(
+                'Анимированное изображение больше %(width)s×%(height)s',
+                code='animated_too_large',
+                params={'width': max_size[0], 'height': max_size[1]},
+            )
+        return _keep_upload(upload, image)
+    if not oversized and 'exif' not in image.info:
+        return _keep_upload(upload, image)
+
+    try:
+        save_format, content, size, placeholder = _reencode(image, max_size)
+    except (Image.DecompressionBombError, OSError):
+        raise ValidationError(
+            'Не удалось прочитать изображение', code='invalid_image'
+        )
+    finally:
+        image.close()
+
+    extension, content_type = SAVE_FORMATS[save_format]
+    name = '{}.{}'.format(
+        os.path.splitext(os.path.basename(upload.name))[0], extension
+    )
+    ingested = SimpleUploadedFile(name, content, content_type=content_type)
+    ingested.image_metadata = _metadata(size, len(content), placeholder)
+    return ingested
+
+
+def image_metadata(field_file):
+    """Размеры, объём в байтах и средний цвет картинки для полей Post.
+
+    Размеры берутся из заголовка, а для цвета JPEG декодируется в
+    уменьшенном масштабе. Бросает OSError, если файл не прочитать, и
+    Image.DecompressionBombError для слишком больших картинок.
+    """
+    was_closed = field_file.closed
+    field_file.open('rb')
+    try:
+        with Image.open(field_file) as image:
+            size = image.size
+            placeholder = _placeholder(image)
+        file_size = field_file.size
+    finally:
+        if was_closed:
+            field_file.close()
+        else:
+            field_file.seek(0)
+    return _metadata(size, file_size, placeholder)
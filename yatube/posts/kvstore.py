@@ -0,0 +1,131 @@
+"""Многоуровневое хранилище метаданных миниатюр для sorl-thumbnail.
+
+Значение ищется по очереди: в ограниченном LRU внутри процесса, в общем
+кэше Django и только потом в таблице thumbnail_kvstore, которая остаётся
+надёжным хранилищем. Метаданные миниатюры не меняются, пока существует
+её файл, поэтому в LRU кладутся только найденные значения: промахи
+кэшируются в общем кэше, как в исходном cached_db_kvstore.
+
+get_many() загружает метаданные для всех миниатюр страницы ленты одним
+запросом к кэшу и одним к БД, после чего теги {% thumbnail %} находят их
+в LRU.
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import (
+    EMPTY_VALUE, KVStore as CachedDBKVStore)
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+
+class LRUCache:
+    """Потокобезопасный словарь, вытесняющий давно не читанные ключи."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class KVStore(CachedDBKVStore):
+
+    def __init__(self):
+        super().__init__()
+        self.local = LRUCache(settings.POSTS_THUMBNAIL_LRU_SIZE)
+
+    def clear(self, delete_thumbnails=False):
+        super().clear(delete_thumbnails)
+        self.local.clear()
+
+    def _get_raw(self, key):
+        value = self.local.get(key)
+        if value is None:
+            value = super()._get_raw(key)
+            if value is not None:
+                self.local.set(key, value)
+        return value
+
+    def _set_raw(self, key, value):
+        super()._set_raw(key, value)
+        self.local.set(key, value)
+
+    def _delete_raw(self, *keys):
+        super()._delete_raw(*keys)
+        for key in keys:
+            self.local.delete(key)
+
+    def get_many_raw(self, keys):
+        """Сырые значения для ключей: не больше одного запроса к кэшу и БД.
+
+        Отсутствующие ключи в результат не попадают.
+        """
+        found = {}
+        missing = []
+        for key in keys:
+            value = self.local.get(key)
+            if value is None:
+                missing.append(key)
+            else:
+                found[key] = value
+        if not missing:
+            return found
+
+        loaded = self.cache.get_many(missing)
+        missing = [key for key in missing if key not in loaded]
+        if missing:
+            stored = dict(
+                KVStoreModel.objects
+                .filter(key__in=missing)
+                .values_list('key', 'value')
+            )
+            self.cache.set_many(
+                {key: stored.get(key, EMPTY_VALUE) for key in missing},
+                thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT,
+            )
+            loaded.update(stored)
+
+        for key, value in loaded.items():
+            if value != EMPTY_VALUE:
+                self.local.set(key, value)
+                found[key] = value
+        return found
+
+    def get_many(self, image_files):
+        """Словарь {ключ файла: ImageFile} для найденных в хранилище."""
+        keys = {add_prefix(image_file.key): image_file.key
+                for image_file in image_files}
+        return {
+            keys[key]: deserialize_image_file(value)
+            for key, value in self.get_many_raw(keys).items()
+        }
@@ -0,0 +1,86 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+
+def measure(client, url, requests):
+    """Запросов в секунду, байт и SQL-запросов на один ответ."""
+    size = queries = 0
+    elapsed = 0.0
+    for _ in range(requests):
+        # Кэш страниц сделал бы HTML бесплатным: сравниваем саму работу
+        cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = client.get(url)
+            elapsed += time.perf_counter() - started
+        if response.status_code != 200:
+            raise CommandError(f'{url}: ответ {response.status_code}')
+        size += len(response.content)
+        queries += len(captured)
+    return requests / elapsed, size // requests, queries // requests
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность JSON API и HTML-страниц '
+        'на текущей базе'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=100,
+            help='Сколько запросов сделать к каждому адресу',
+        )
+
+    def resources(self):
+        post = Post.objects.select_related('author', 'group').first()
+        if post is None:
+            raise CommandError('В базе нет постов')
+        group = post.group or Group.objects.order_by('-posts_count').first()
+        resources = [
+            ('index', reverse('posts:index'), reverse('posts:api_posts')),
+            (
+                'profile',
+                reverse('posts:profile', args=[post.author.username]),
+                reverse('posts:api_author_posts',
+                        args=[post.author.username]),
+            ),
+            (
+                'post',
+                reverse('posts:post_detail', args=[post.pk]),
+                reverse('posts:api_post', args=[post.pk]),
+            ),
+        ]
+        if group is not None:
+            resources.insert(1, (
+                'group',
+                reverse('posts:groups', args=[group.slug]),
+                reverse('posts:api_group_posts', args=[group.slug]),
+            ))
+        return resources
+
+    def handle(self, *args, **options):
+        client = Client()
+        self.stdout.write(
+            f'{"ресурс":<10}{"формат":<8}{"запр/с":>10}'
+            f'{"байт":>10}{"SQL":>6}'
+        )
+        for name, html_url, api_url in self.resources():
+            for label, url in (('html', html_url), ('json', api_url)):
+                rate, size, queries = measure(
+                    client, url, options['requests']
+                )
+                self.stdout.write(
+                    f'{name:<10}{label:<8}{rate:>10.1f}'
+                    f'{size:>10}{queries:>6}'
+                )
@@ -0,0 +1,135 @@
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import got_request_exception
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+
+BENCH_USERNAME = 'bench-concurrency'
+
+# Журнал по умолчанию без PRAGMA из SQLITE_PRAGMAS. Режим журнала
+# сохраняется в файле базы, поэтому его нужно вернуть явно
+STOCK_PRAGMAS = {'journal_mode': 'DELETE'}
+
+# Исключение последнего запроса потока. Client передаёт исключения
+# представлений через общий обработчик сигнала, который при нескольких
+# потоках может поднять чужую ошибку, поэтому ошибки собираются здесь
+_last_request = threading.local()
+
+
+def record_exception(sender, request=None, **kwargs):
+    _last_request.error = sys.exc_info()[1]
+
+
+def run_client(kind, deadline, results, request):
+    """Выполняет request(client) до deadline и считает исходы."""
+    client = Client()
+    counts = Counter()
+    try:
+        if kind == 'writer':
+            client.force_login(User.objects.get(username=BENCH_USERNAME))
+        while time.monotonic() < deadline:
+            _last_request.error = None
+            try:
+                response = request(client)
+            except Exception:
+                response = None
+            error = _last_request.error
+            if error is not None:
+                counts['locked' if 'locked' in str(error) else 'errors'] += 1
+            elif response is not None and response.status_code in (200, 302):
+                counts['ok'] += 1
+            elif response is not None:
+                counts['errors'] += 1
+    finally:
+        connections.close_all()
+        results.append((kind, counts))
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает ленту читателями и создание постов писателями в '
+        'параллельных потоках и сравнивает SQLite без настройки и с '
+        'SQLITE_PRAGMAS. Созданные посты удаляются после замера'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument(
+            '--seconds',
+            type=float,
+            default=5,
+            help='Длительность каждого замера',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Замер рассчитан на SQLite')
+        User.objects.filter(username=BENCH_USERNAME).delete()
+        User.objects.create_user(username=BENCH_USERNAME)
+        got_request_exception.connect(record_exception)
+        self.stdout.write(
+            f'{"режим":<8}{"чтений/с":>10}{"записей/с":>11}'
+            f'{"locked":>8}{"ошибок":>8}'
+        )
+        try:
+            for label, pragmas in (
+                ('stock', STOCK_PRAGMAS),
+                ('tuned', settings.SQLITE_PRAGMAS),
+            ):
+                # Новые PRAGMA применяются только к новым соединениям
+                connections.close_all()
+                with override_settings(SQLITE_PRAGMAS=pragmas):
+                    self.measure(label, options)
+        finally:
+            got_request_exception.disconnect(record_exception)
+            connections.close_all()
+            User.objects.filter(username=BENCH_USERNAME).delete()
+
+    def measure(self, label, options):
+        index_url = reverse('posts:index')
+        create_url = reverse('posts:post_create')
+        deadline = time.monotonic() + options['seconds']
+        results = []
+        threads = [
+            threading.Thread(target=run_client, args=(
+                'reader', deadline, results,
+                lambda client: client.get(index_url),
+            ))
+            for _ in range(options['readers'])
+        ] + [
+            threading.Thread(target=run_client, args=(
+                'writer', deadline, results,
+                lambda client: client.post(
+                    create_url, {'text': 'Замер параллельной записи'}
+                ),
+            ))
+            for _ in range(options['writers'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        totals = {'reader': Counter(), 'writer': Counter()}
+        for kind, counts in results:
+            totals[kind].update(counts)
+        locked = sum(counts['locked'] for counts in totals.values())
+        errors = sum(counts['errors'] for counts in totals.values())
+        seconds = options['seconds']
+        self.stdout.write(
+            f'{label:<8}{totals["reader"]["ok"] / seconds:>10.1f}'
+            f'{totals["writer"]["ok"] / seconds:>11.1f}'
+            f'{locked:>8}{errors:>8}'
+        )
+        Post.objects.filter(author__username=BENCH_USERNAME).delete()
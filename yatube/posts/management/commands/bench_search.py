@@ -0,0 +1,95 @@
+import random
+import statistics
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from posts.caching import GLOBAL_SCOPE, author_scope, bump_generations
+from posts.models import Post, User
+from posts.search import SearchResults, is_supported
+
+
+PAGE_SIZE = 10
+BENCH_USERNAME = 'bench_search'
+VOCABULARY = (
+    'город река лес поле дом окно дверь книга письмо дорога утро вечер '
+    'солнце ветер снег дождь море берег гора камень огонь вода хлеб '
+    'чай кофе кошка собака птица рыба друг брат сестра школа работа '
+    'музыка песня фильм театр поезд самолёт машина велосипед сад цветок'
+).split()
+DEFAULT_TERMS = ('кошка', 'самолёт велосипед', 'театр песня музыка')
+
+
+def measure(func, repeat):
+    """Медиана времени выполнения func в миллисекундах."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def like_search(term):
+    query_set = Post.objects.feed().filter(text__icontains=term)
+    return query_set.count(), list(query_set[:PAGE_SIZE])
+
+
+def fts_search(term):
+    results = SearchResults(term)
+    return results.count(), results[:PAGE_SIZE]
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает поиск по индексу FTS5 с LIKE '%...%'. "
+        'Запускайте на отдельной базе: --seed добавляет синтетические посты'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('terms', nargs='*', help='Поисковые запросы')
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Сколько синтетических постов добавить перед замером',
+        )
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        if not is_supported():
+            raise CommandError('Полнотекстовый индекс есть только в SQLite')
+        if options['seed']:
+            self.seed(options['seed'], options['batch_size'])
+
+        self.stdout.write(f'Постов в базе: {Post.objects.count()}')
+        self.stdout.write(f'{"запрос":<30}{"LIKE, мс":>12}{"FTS5, мс":>12}')
+        for term in options['terms'] or DEFAULT_TERMS:
+            like_ms = measure(lambda: like_search(term), options['repeat'])
+            fts_ms = measure(lambda: fts_search(term), options['repeat'])
+            self.stdout.write(f'{term:<30}{like_ms:>12.2f}{fts_ms:>12.2f}')
+
+    def seed(self, count, batch_size):
+        author, _ = User.objects.get_or_create(username=BENCH_USERNAME)
+        rng = random.Random(count)
+        created = 0
+        while created < count:
+            size = min(batch_size, count - created)
+            with transaction.atomic():
+                Post.objects.bulk_create(
+                    Post(
+                        text=' '.join(
+                            rng.choices(VOCABULARY, k=rng.randint(8, 40))
+                        ),
+                        author=author,
+                    )
+                    for _ in range(size)
+                )
+            created += size
+            self.stdout.write(f'Добавлено постов: {created}')
+        # bulk_create не вызывает сигналы: счётчики и кэш обновляем сами
+        call_command('rebuild_post_counters', stdout=self.stdout)
+        bump_generations(GLOBAL_SCOPE, author_scope(author.pk))
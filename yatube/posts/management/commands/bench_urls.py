@@ -0,0 +1,213 @@
+import json
+import math
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import URLResolver, get_resolver, reverse
+
+from core.timing import QueryTimer
+from posts.models import AuthorStats, Group, Post
+
+
+# Пространства имён, маршруты которых замеряются
+NAMESPACES = ('posts', 'users', 'about')
+IDENTITIES = ('anonymous', 'user')
+# Метрики, которые сравниваются с базовой линией
+LATENCY_METRIC = 'p95_ms'
+
+
+def percentile(values, fraction):
+    """Значение ранга ceil(fraction * n) отсортированного values."""
+    ordered = sorted(values)
+    rank = max(math.ceil(fraction * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def routes():
+    """(имя маршрута, имена параметров) для всех путей NAMESPACES."""
+    for resolver in get_resolver().url_patterns:
+        if (
+            not isinstance(resolver, URLResolver)
+            or resolver.namespace not in NAMESPACES
+        ):
+            continue
+        for pattern in resolver.url_patterns:
+            if pattern.name is None:
+                continue
+            yield (
+                f'{resolver.namespace}:{pattern.name}',
+                tuple(pattern.pattern.converters),
+            )
+
+
+def response_size(response):
+    if response.streaming:
+        return sum(len(part) for part in response.streaming_content)
+    return len(response.content)
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержку, число и время SQL-запросов и размер ответа '
+        'каждого маршрута posts, users и about для анонима и автора; '
+        'сохраняет базовую линию в JSON и сравнивает с ней'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=50,
+            help='Сколько запросов сделать к каждому маршруту',
+        )
+        parser.add_argument(
+            '--cold',
+            action='store_true',
+            help='Очищать кэш перед каждым запросом',
+        )
+        parser.add_argument('--save', help='Записать результаты в JSON')
+        parser.add_argument(
+            '--baseline', help='Сравнить с сохранённой базовой линией',
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.5,
+            help='Допустимый относительный рост p95',
+        )
+        parser.add_argument(
+            '--min-delta-ms',
+            type=float,
+            default=5.0,
+            help='Рост p95 меньше этого не считается регрессией',
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests должен быть положительным')
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as source:
+                baseline = json.load(source)
+
+        self.user, samples = self.samples()
+        self.stdout.write(
+            f'{"маршрут":<28}{"клиент":<11}{"код":>5}{"p50":>8}'
+            f'{"p95":>8}{"p99":>8}{"SQL":>5}{"SQL мс":>8}{"байт":>9}'
+        )
+        results = {}
+        for name, parameters in routes():
+            if any(parameter not in samples for parameter in parameters):
+                self.stderr.write(f'{name}: нет значений для {parameters}')
+                continue
+            url = reverse(name, kwargs={
+                parameter: samples[parameter] for parameter in parameters
+            })
+            for identity in IDENTITIES:
+                key = f'{name} {identity}'
+                results[key] = self.measure(url, identity, options)
+                self.write_row(name, identity, results[key])
+
+        if options['save']:
+            with open(options['save'], 'w', encoding='utf-8') as target:
+                json.dump(results, target, ensure_ascii=False, indent=2)
+                target.write('\n')
+        if baseline is not None:
+            self.compare(results, baseline, options)
+
+    def samples(self):
+        """Автор для входа и значения параметров маршрутов."""
+        stats = (
+            AuthorStats.objects.filter(posts_count__gt=0)
+            .select_related('author').order_by('-posts_count').first()
+        )
+        if stats is None:
+            raise CommandError(
+                'В базе нет постов: сначала выполните manage.py seed'
+            )
+        author = stats.author
+        post = Post.objects.filter(author=author).latest('pub_date')
+        samples = {
+            'username': author.username,
+            'post_id': post.pk,
+            'name': 'posts',
+        }
+        group = Group.objects.order_by('-posts_count').first()
+        if group is not None:
+            samples['slug'] = group.slug
+        return author, samples
+
+    def measure(self, url, identity, options):
+        client = Client()
+        latencies = []
+        size = status = 0
+        timer = QueryTimer()
+        # Первый запрос прогревает кэши процесса и не учитывается
+        for number in range(options['requests'] + 1):
+            if identity == 'user':
+                # Выход (users:logout) завершает сессию: входим заново
+                client.force_login(self.user)
+            if options['cold']:
+                cache.clear()
+            if number == 1:
+                timer = QueryTimer()
+            with connection.execute_wrapper(timer):
+                started = time.perf_counter()
+                response = client.get(url)
+                size = response_size(response)
+                elapsed = time.perf_counter() - started
+            if number:
+                latencies.append(elapsed * 1000)
+            status = response.status_code
+        requests = options['requests']
+        return {
+            'url': url,
+            'status': status,
+            'p50_ms': round(percentile(latencies, 0.50), 3),
+            'p95_ms': round(percentile(latencies, 0.95), 3),
+            'p99_ms': round(percentile(latencies, 0.99), 3),
+            'queries': timer.queries // requests,
+            'sql_ms': round(timer.seconds * 1000 / requests, 3),
+            'bytes': size,
+        }
+
+    def write_row(self, name, identity, result):
+        self.stdout.write(
+            f'{name:<28}{identity:<11}{result["status"]:>5}'
+            f'{result["p50_ms"]:>8.1f}{result["p95_ms"]:>8.1f}'
+            f'{result["p99_ms"]:>8.1f}{result["queries"]:>5}'
+            f'{result["sql_ms"]:>8.1f}{result["bytes"]:>9}'
+        )
+
+    def compare(self, results, baseline, options):
+        regressions = []
+        for key, result in results.items():
+            previous = baseline.get(key)
+            if previous is None:
+                continue
+            limit = max(
+                previous[LATENCY_METRIC] * (1 + options['threshold']),
+                previous[LATENCY_METRIC] + options['min_delta_ms'],
+            )
+            if result[LATENCY_METRIC] > limit:
+                regressions.append(
+                    f'{key}: p95 {result[LATENCY_METRIC]:.1f} мс, '
+                    f'было {previous[LATENCY_METRIC]:.1f} мс'
+                )
+            # Число запросов не зависит от шума: любой рост - регрессия
+            if result['queries'] > previous['queries']:
+                regressions.append(
+                    f'{key}: SQL-запросов {result["queries"]}, '
+                    f'было {previous["queries"]}'
+                )
+        if regressions:
+            raise CommandError(
+                'Регрессии относительно базовой линии:\n'
+                + '\n'.join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS(
+            'Регрессий относительно базовой линии нет'
+        ))
@@ -0,0 +1,76 @@
+import gzip
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import (CHUNK_SIZE, EXPORTS, FORMATS, buffered, lines,
+                          parse_since)
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково выгружает посты, группы или пользователей в JSONL или '
+        'CSV; с --since - только записи после id или даты'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл результата или - для stdout',
+        )
+        parser.add_argument('--table', choices=EXPORTS, default='posts')
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument(
+            '--since',
+            help='id последней выгруженной записи или дата ISO 8601',
+        )
+        parser.add_argument(
+            '--gzip', action='store_true', help='Сжимать результат gzip',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Сколько строк читать из базы за раз',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            since = parse_since(options['since'])
+        except ValueError as error:
+            raise CommandError(error)
+        table = options['table']
+        if since is not None and not isinstance(since, int):
+            if EXPORTS[table].date_field is None:
+                raise CommandError('Для этой таблицы --since - только id')
+
+        rows = lines(table, options['format'], since, options['chunk_size'])
+        if options['format'] == 'csv':
+            # Заголовок CSV не считается записью
+            self.written = -1
+        else:
+            self.written = 0
+        stream = self.open(options['path'], options['gzip'])
+        try:
+            for part in buffered(self.counted(rows)):
+                stream.write(part)
+        finally:
+            if stream is not self.stdout:
+                stream.close()
+        self.stderr.write(self.style.SUCCESS(
+            f'Выгружено записей: {max(self.written, 0)}'
+        ))
+
+    def open(self, path, compress):
+        if path == '-' and compress:
+            return gzip.open(sys.stdout.buffer, 'wt', encoding='utf-8')
+        if path == '-':
+            return self.stdout
+        if compress:
+            return gzip.open(path, 'wt', encoding='utf-8', newline='')
+        return open(path, 'w', encoding='utf-8', newline='')
+
+    def counted(self, rows):
+        for row in rows:
+            self.written += 1
+            yield row
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from posts.caching import fragment_stats, reset_fragment_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает попадания и промахи кэша карточек постов в выборке '
+        'POSTS_FRAGMENT_STATS_RATE (счётчики видны другим процессам '
+        'только при общем бэкенде кэша)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Обнулить счётчики после вывода',
+        )
+
+    def handle(self, *args, **options):
+        stats = fragment_stats()
+        total = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / total if total else 0
+        self.stdout.write(
+            f'Попаданий: {stats["hits"]}\n'
+            f'Промахов: {stats["misses"]}\n'
+            f'Доля попаданий: {ratio:.1%}'
+        )
+        if options['reset']:
+            reset_fragment_stats()
@@ -0,0 +1,77 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from posts.models import Post
+from posts.thumbnails import generate_thumbnails
+
+
+BATCH_SIZE = 1000
+
+
+def image_names():
+    """Имена картинок постов пачками по первичному ключу.
+
+    Курсор не держится открытым между пачками, чтобы потоки могли
+    писать в хранилище миниатюр, не упираясь в блокировку SQLite.
+    """
+    last_pk = 0
+    while True:
+        rows = list(
+            Post.objects.filter(pk__gt=last_pk)
+            .exclude(image='')
+            .order_by('pk')
+            .values_list('pk', 'image')[:BATCH_SIZE]
+        )
+        if not rows:
+            return
+        last_pk = rows[-1][0]
+        yield from dict.fromkeys(name for _, name in rows)
+
+
+def generate(name):
+    try:
+        generate_thumbnails(name)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Создаёт миниатюры для всех уже загруженных картинок постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Число параллельных потоков',
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        done = failed = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = {}
+            for name in image_names():
+                # Держим в очереди не больше двух задач на поток, чтобы
+                # не загружать в память список всех картинок сразу
+                if len(pending) >= workers * 2:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        failed += self.report(future, pending.pop(future))
+                        done += 1
+                pending[executor.submit(generate, name)] = name
+            for future in list(pending):
+                failed += self.report(future, pending.pop(future))
+                done += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано картинок: {done}, ошибок: {failed}'
+        ))
+
+    def report(self, future, name):
+        error = future.exception()
+        if error is None:
+            return 0
+        self.stderr.write(f'{name}: {error}')
+        return 1
@@ -0,0 +1,248 @@
+import csv
+import json
+import os
+import sys
+from collections import defaultdict
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.caching import (GLOBAL_SCOPE, author_scope, bump_generations,
+                           group_scope)
+from posts.models import Group, ImportCheckpoint, Post, User
+from posts.signals import author_posted, group_posted
+
+
+# Меньше лимита переменных в одном запросе SQLite
+LOOKUP_BATCH_SIZE = 500
+
+
+class InvalidRecord(Exception):
+    """Запись источника нельзя импортировать."""
+
+
+def read_csv(stream):
+    yield from csv.DictReader(stream)
+
+
+def read_jsonl(stream):
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            # Номер записи должен сохраниться: отдаём её как ошибочную
+            yield None
+
+
+READERS = {
+    'csv': read_csv,
+    'jsonl': read_jsonl,
+}
+
+
+def chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class Resolver:
+    """Отображение имён авторов и slug групп в id с пакетной дозагрузкой."""
+
+    def __init__(self, model, field, create=None):
+        self.model = model
+        self.field = field
+        self.create = create
+        self.ids = {}
+
+    def load(self, names):
+        missing = {name for name in names if name not in self.ids}
+        for batch in chunks(sorted(missing), LOOKUP_BATCH_SIZE):
+            self.ids.update(
+                self.model.objects.filter(**{f'{self.field}__in': batch})
+                .values_list(self.field, 'pk')
+            )
+        missing -= self.ids.keys()
+        if missing and self.create is not None:
+            self.model.objects.bulk_create(
+                [self.create(name) for name in sorted(missing)]
+            )
+            self.load(missing)
+
+    def get(self, name):
+        return self.ids.get(name)
+
+
+def new_author(username):
+    return User(username=username, password=make_password(None))
+
+
+def new_group(slug):
+    return Group(title=slug, slug=slug, description='')
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует посты из CSV или JSONL (поля text, author, group, '
+        'pub_date) пакетами через bulk_create с продолжением с места '
+        'остановки'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл источника или - для stdin')
+        parser.add_argument('--format', choices=READERS)
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько постов вставлять одним bulk_create',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=10000,
+            help='Сколько записей обрабатывать в одной транзакции',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Имя точки продолжения (по умолчанию - имя файла)',
+        )
+        parser.add_argument(
+            '--create-authors',
+            action='store_true',
+            help='Создавать отсутствующих авторов без пароля',
+        )
+        parser.add_argument(
+            '--create-groups',
+            action='store_true',
+            help='Создавать отсутствующие группы',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        source_format = options['format'] or os.path.splitext(path)[1][1:]
+        if source_format not in READERS:
+            raise CommandError('Укажите --format: csv или jsonl')
+        name = options['checkpoint'] or os.path.basename(path)
+        if path == '-' and not options['checkpoint']:
+            raise CommandError('Для stdin укажите --checkpoint')
+
+        self.batch_size = options['batch_size']
+        self.authors = Resolver(
+            User, 'username',
+            new_author if options['create_authors'] else None,
+        )
+        self.groups = Resolver(
+            Group, 'slug',
+            new_group if options['create_groups'] else None,
+        )
+        checkpoint, _ = ImportCheckpoint.objects.get_or_create(name=name)
+        if checkpoint.position:
+            self.stdout.write(
+                f'Продолжаем после записи {checkpoint.position}'
+            )
+
+        stream = sys.stdin if path == '-' else open(
+            path, newline='', encoding='utf-8'
+        )
+        imported = skipped = 0
+        try:
+            records = islice(
+                READERS[source_format](stream), checkpoint.position, None
+            )
+            for chunk in chunks(records, options['chunk_size']):
+                added, failed = self.import_chunk(
+                    chunk, checkpoint, checkpoint.position + 1
+                )
+                imported += added
+                skipped += failed
+                self.stdout.write(
+                    f'Обработано записей: {checkpoint.position}'
+                )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано постов: {imported}, пропущено: {skipped}'
+        ))
+
+    def import_chunk(self, records, checkpoint, first_number):
+        """Вставляет записи и счётчики, сдвигает checkpoint; всё атомарно."""
+        valid = [record for record in records if isinstance(record, dict)]
+        self.authors.load(
+            {record.get('author') for record in valid} - {None, ''}
+        )
+        self.groups.load(
+            {record.get('group') for record in valid} - {None, ''}
+        )
+        posts = []
+        for number, record in enumerate(records, first_number):
+            try:
+                posts.append(self.build_post(record))
+            except InvalidRecord as error:
+                self.stderr.write(f'Запись {number}: {error}')
+
+        with transaction.atomic():
+            # Дата источника пишется в том же INSERT, без повторной записи
+            Post.objects.bulk_create_dated(posts, batch_size=self.batch_size)
+            # bulk_create не вызывает сигналы: счётчики обновляем сами,
+            # а полнотекстовый индекс обновляют триггеры на вставку
+            scopes = self.update_counters(posts)
+            checkpoint.position += len(records)
+            checkpoint.save(update_fields=['position', 'updated_at'])
+        bump_generations(GLOBAL_SCOPE, *scopes)
+        return len(posts), len(records) - len(posts)
+
+    def build_post(self, record):
+        if not isinstance(record, dict):
+            raise InvalidRecord('запись не разобрана')
+        text = (record.get('text') or '').strip()
+        if not text:
+            raise InvalidRecord('пустой текст')
+        author_id = self.authors.get(record.get('author'))
+        if author_id is None:
+            raise InvalidRecord(f'нет автора {record.get("author")!r}')
+        group_id = None
+        if record.get('group'):
+            group_id = self.groups.get(record['group'])
+            if group_id is None:
+                raise InvalidRecord(f'нет группы {record["group"]!r}')
+        pub_date = timezone.now()
+        if record.get('pub_date'):
+            pub_date = parse_datetime(record['pub_date'])
+            if pub_date is None:
+                raise InvalidRecord(f'неверная дата {record["pub_date"]!r}')
+            if timezone.is_naive(pub_date):
+                pub_date = timezone.make_aware(pub_date)
+        return Post(
+            text=text,
+            author_id=author_id,
+            group_id=group_id,
+            pub_date=pub_date,
+        )
+
+    def update_counters(self, posts):
+        """Увеличивает счётчики авторов и групп; возвращает области кэша."""
+        authors = defaultdict(list)
+        groups = defaultdict(list)
+        for post in posts:
+            authors[post.author_id].append(post.pub_date)
+            if post.group_id is not None:
+                groups[post.group_id].append(post.pub_date)
+        for author_id, dates in authors.items():
+            author_posted(author_id, max(dates), len(dates))
+        for group_id, dates in groups.items():
+            group_posted(group_id, max(dates), len(dates))
+        return (
+            [author_scope(pk) for pk in authors]
+            + [group_scope(pk) for pk in groups]
+        )
@@ -0,0 +1,97 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Max
+
+from posts.caching import (GLOBAL_SCOPE, author_scope, bump_generations,
+                           group_scope)
+from posts.models import AuthorStats, Group, Post
+
+
+EMPTY = (0, None)
+
+
+def actual_counters(field):
+    """Фактические счётчики по полю field, посчитанные по таблице постов."""
+    rows = (
+        Post.objects.filter(**{f'{field}__isnull': False})
+        .order_by()
+        .values(field)
+        .annotate(posts_count=Count('id'), last_post_at=Max('pub_date'))
+    )
+    return {
+        row[field]: (row['posts_count'], row['last_post_at'])
+        for row in rows.iterator()
+    }
+
+
+def stored_counters(query_set, key):
+    rows = query_set.values_list(key, 'posts_count', 'last_post_at')
+    return {pk: (count, last) for pk, count, last in rows.iterator()}
+
+
+def mismatches(actual, stored):
+    """Ключи с расхождениями и правильные значения для них."""
+    return {
+        pk: actual.get(pk, EMPTY)
+        for pk in actual.keys() | stored.keys()
+        if actual.get(pk, EMPTY) != stored.get(pk, EMPTY)
+    }
+
+
+def fix_authors(wrong):
+    for pk, (posts_count, last_post_at) in wrong.items():
+        AuthorStats.objects.update_or_create(
+            author_id=pk,
+            defaults={
+                'posts_count': posts_count,
+                'last_post_at': last_post_at,
+            },
+        )
+
+
+def fix_groups(wrong):
+    for pk, (posts_count, last_post_at) in wrong.items():
+        Group.objects.filter(pk=pk).update(
+            posts_count=posts_count,
+            last_post_at=last_post_at,
+        )
+
+
+class Command(BaseCommand):
+    help = 'Проверяет и пересчитывает денормализованные счётчики постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Только проверить счётчики, ничего не исправляя',
+        )
+
+    def handle(self, *args, **options):
+        wrong_authors = mismatches(
+            actual_counters('author'),
+            stored_counters(AuthorStats.objects.all(), 'author_id'),
+        )
+        wrong_groups = mismatches(
+            actual_counters('group'),
+            stored_counters(Group.objects.all(), 'pk'),
+        )
+        self.stdout.write(
+            f'Авторов с неверными счётчиками: {len(wrong_authors)}\n'
+            f'Групп с неверными счётчиками: {len(wrong_groups)}'
+        )
+        if options['verify']:
+            if wrong_authors or wrong_groups:
+                raise CommandError('Счётчики расходятся с данными')
+            return
+        with transaction.atomic():
+            fix_authors(wrong_authors)
+            fix_groups(wrong_groups)
+        if wrong_authors or wrong_groups:
+            # Счётчики выводятся на страницах авторов, групп и постов
+            bump_generations(
+                GLOBAL_SCOPE,
+                *[author_scope(pk) for pk in wrong_authors],
+                *[group_scope(pk) for pk in wrong_groups],
+            )
+        self.stdout.write(self.style.SUCCESS('Счётчики пересчитаны'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.search import is_supported, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс постов (SQLite FTS5)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            default='default',
+            help='Псевдоним базы данных',
+        )
+
+    def handle(self, *args, **options):
+        if not is_supported(options['database']):
+            raise CommandError('Полнотекстовый индекс есть только в SQLite')
+        rebuild_search_index(options['database'])
+        self.stdout.write(self.style.SUCCESS('Индекс поиска перестроен'))
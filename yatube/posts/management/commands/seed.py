@@ -0,0 +1,247 @@
+import random
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from faker import Faker
+from PIL import Image
+
+from posts.caching import GLOBAL_SCOPE, bump_generations
+from posts.images import image_metadata
+from posts.models import AuthorStats, Group, Post, User
+
+
+# Тексты собираются из готовых предложений: Faker на каждый пост
+# медленнее вставки в базу
+SENTENCE_POOL_SIZE = 5000
+# Столько разных картинок делят между собой посты с картинками
+IMAGE_POOL_SIZE = 20
+IMAGE_SIZE = (640, 480)
+
+
+def zipf_weights(count, exponent):
+    """Накопленные веса, при которых i-й элемент встречается в ~1/i^s раз."""
+    return list(accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)
+    ))
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт воспроизводимый набор пользователей, групп и постов '
+        'для замеров: авторы и группы распределены неравномерно (Zipf), '
+        'вставка - через bulk_create'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Одинаковый seed даёт одинаковые данные',
+        )
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель Zipf для авторов и групп, 0 - равномерно',
+        )
+        parser.add_argument(
+            '--no-group', type=float, default=0.3,
+            help='Доля постов без группы',
+        )
+        parser.add_argument(
+            '--images', type=float, default=0.0,
+            help='Доля постов с картинкой',
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько дней до --until распределены посты',
+        )
+        parser.add_argument(
+            '--until', default='2024-01-01',
+            help='Дата самого нового поста, YYYY-MM-DD',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Сколько записей вставлять в одной транзакции',
+        )
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь')
+        try:
+            until = datetime.strptime(
+                options['until'], '%Y-%m-%d'
+            ).replace(tzinfo=timezone.utc)
+        except ValueError:
+            raise CommandError('--until должен быть датой YYYY-MM-DD')
+        self.prefix = f'seed{options["seed"]}-'
+        if User.objects.filter(username__startswith=self.prefix).exists():
+            raise CommandError(
+                f'Данные с seed {options["seed"]} уже созданы'
+            )
+        self.random = random.Random(options['seed'])
+        self.fake = Faker('ru_RU')
+        self.fake.seed_instance(options['seed'])
+        self.batch_size = options['batch_size']
+
+        author_ids = self.create_users(options['users'])
+        group_ids = self.create_groups(options['groups'])
+        images = self.create_images() if options['images'] else []
+        sentences = [
+            self.fake.sentence() for _ in range(SENTENCE_POOL_SIZE)
+        ]
+        self.image_uses = Counter()
+        authors, groups = self.create_posts(
+            options, until, author_ids, group_ids, images, sentences
+        )
+        self.update_counters(authors, groups)
+        self.count_image_references(images)
+        bump_generations(GLOBAL_SCOPE)
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано пользователей: {len(author_ids)}, групп: '
+            f'{len(group_ids)}, постов: {options["posts"]}'
+        ))
+
+    def create_users(self, count):
+        password = make_password(None)
+        for start in range(0, count, self.batch_size):
+            User.objects.bulk_create([
+                User(
+                    username=f'{self.prefix}{number}',
+                    first_name=self.fake.first_name(),
+                    last_name=self.fake.last_name(),
+                    password=password,
+                )
+                for number in range(
+                    start, min(start + self.batch_size, count)
+                )
+            ])
+        return list(
+            User.objects.filter(username__startswith=self.prefix)
+            .order_by('pk').values_list('pk', flat=True)
+        )
+
+    def create_groups(self, count):
+        Group.objects.bulk_create([
+            Group(
+                title=self.fake.catch_phrase(),
+                slug=f'{self.prefix}{number}',
+                description=self.fake.sentence(),
+            )
+            for number in range(count)
+        ])
+        return list(
+            Group.objects.filter(slug__startswith=self.prefix)
+            .order_by('pk').values_list('pk', flat=True)
+        )
+
+    def create_images(self):
+        """Имена и метаданные IMAGE_POOL_SIZE разных картинок в хранилище."""
+        field = Post._meta.get_field('image')
+        images = []
+        for number in range(IMAGE_POOL_SIZE):
+            color = tuple(self.random.randrange(256) for _ in range(3))
+            buffer = BytesIO()
+            Image.new('RGB', IMAGE_SIZE, color).save(buffer, 'JPEG')
+            name = field.storage.save(
+                f'posts/seed-{number}.jpg', ContentFile(buffer.getvalue())
+            )
+            images.append((name, image_metadata(Post(image=name).image)))
+        return images
+
+    def create_posts(self, options, until, author_ids, group_ids, images,
+                     sentences):
+        """Вставляет посты; возвращает счётчики и даты авторов и групп."""
+        total = options['posts']
+        author_weights = zipf_weights(len(author_ids), options['skew'])
+        group_weights = zipf_weights(len(group_ids), options['skew'])
+        start = until - timedelta(days=options['days'])
+        step = timedelta(days=options['days']) / max(total, 1)
+        authors = Counter()
+        groups = Counter()
+        last_dates = {}
+        for first in range(0, total, self.batch_size):
+            size = min(self.batch_size, total - first)
+            batch_authors = self.random.choices(
+                author_ids, cum_weights=author_weights, k=size
+            )
+            batch_groups = [None] * size
+            if group_ids:
+                batch_groups = [
+                    group_id
+                    if self.random.random() >= options['no_group']
+                    else None
+                    for group_id in self.random.choices(
+                        group_ids, cum_weights=group_weights, k=size
+                    )
+                ]
+            posts = []
+            for number, author_id, group_id in zip(
+                range(first, first + size), batch_authors, batch_groups
+            ):
+                # Даты растут вместе с id, как у настоящих постов
+                pub_date = start + step * (number + 1)
+                post = Post(
+                    text=' '.join(self.random.choices(
+                        sentences, k=self.random.randint(1, 6)
+                    )),
+                    author_id=author_id,
+                    group_id=group_id,
+                    pub_date=pub_date,
+                )
+                if images and self.random.random() < options['images']:
+                    name, metadata = self.random.choice(images)
+                    post.image = name
+                    self.image_uses[name] += 1
+                    for field, value in metadata.items():
+                        setattr(post, field, value)
+                authors[author_id] += 1
+                last_dates[('author', author_id)] = pub_date
+                if group_id is not None:
+                    groups[group_id] += 1
+                    last_dates[('group', group_id)] = pub_date
+                posts.append(post)
+            with transaction.atomic():
+                Post.objects.bulk_create_dated(posts)
+            self.stdout.write(f'Создано постов: {first + size}')
+        return (
+            {
+                pk: (count, last_dates[('author', pk)])
+                for pk, count in authors.items()
+            },
+            {
+                pk: (count, last_dates[('group', pk)])
+                for pk, count in groups.items()
+            },
+        )
+
+    def update_counters(self, authors, groups):
+        # bulk_create не вызывает сигналы: счётчики новых авторов и групп
+        # записываются сразу итоговыми значениями
+        AuthorStats.objects.bulk_create([
+            AuthorStats(author_id=pk, posts_count=count, last_post_at=last)
+            for pk, (count, last) in authors.items()
+        ])
+        Group.objects.bulk_update([
+            Group(pk=pk, posts_count=count, last_post_at=last)
+            for pk, (count, last) in groups.items()
+        ], ['posts_count', 'last_post_at'], batch_size=self.batch_size)
+
+    def count_image_references(self, images):
+        # save() хранилища учёл одну ссылку на картинку, а посты на неё
+        # записаны через bulk_create: доводим счётчик до числа постов
+        storage = Post._meta.get_field('image').storage
+        for name, _ in images:
+            uses = self.image_uses[name]
+            if uses:
+                storage.claim(name, uses - 1)
+            else:
+                storage.release(name)
@@ -0,0 +1,43 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:36
+
+from django.db import migrations, models
+
+
+def fill_group_stats(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Group = apps.get_model('posts', 'Group')
+    rows = (
+        Post.objects.filter(group__isnull=False)
+        .order_by()
+        .values('group')
+        .annotate(
+            posts_count=models.Count('id'),
+            last_post_at=models.Max('pub_date'),
+        )
+    )
+    for row in rows.iterator():
+        Group.objects.filter(pk=row['group']).update(
+            posts_count=row['posts_count'],
+            last_post_at=row['last_post_at'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_author_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='last_post_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True, verbose_name='Дата последней публикации'),
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество публикаций'),
+        ),
+        migrations.RunPython(fill_group_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:50
+
+from django.db import migrations, models
+from PIL import Image
+
+
+BATCH_SIZE = 500
+FIELDS = ['image_width', 'image_height', 'image_size', 'image_placeholder']
+PLACEHOLDER_DRAFT_SIZE = (64, 64)
+
+
+def image_metadata(field_file):
+    """Метаданные картинки на момент миграции (копия из posts.images)."""
+    field_file.open('rb')
+    try:
+        with Image.open(field_file) as image:
+            width, height = image.size
+            image.draft('RGB', PLACEHOLDER_DRAFT_SIZE)
+            red, green, blue = (
+                image.convert('RGB').resize((1, 1), Image.BOX).getpixel((0, 0))
+            )
+        size = field_file.size
+    finally:
+        field_file.close()
+    return {
+        'image_width': width,
+        'image_height': height,
+        'image_size': size,
+        'image_placeholder': f'#{red:02x}{green:02x}{blue:02x}',
+    }
+
+
+def fill_image_metadata(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    posts = (
+        Post.objects.exclude(image='')
+        .filter(image_width__isnull=True)
+        .only('pk', 'image')
+        .order_by('pk')
+    )
+    last_pk = 0
+    while True:
+        batch = list(posts.filter(pk__gt=last_pk)[:BATCH_SIZE])
+        if not batch:
+            return
+        last_pk = batch[-1].pk
+        for post in batch:
+            try:
+                metadata = image_metadata(post.image)
+            except (Image.DecompressionBombError, OSError):
+                # Файла нет в хранилище или он слишком велик для
+                # декодирования: оставляем поля пустыми
+                continue
+            for field, value in metadata.items():
+                setattr(post, field, value)
+        Post.objects.bulk_update(batch, FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_post_image_content_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Высота картинки'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_placeholder',
+            field=models.CharField(blank=True, editable=False, help_text='Средний цвет картинки в виде #rrggbb', max_length=7, verbose_name='Цвет-заглушка картинки'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_size',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Размер картинки, байт'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ширина картинки'),
+        ),
+        migrations.RunPython(fill_image_metadata, migrations.RunPython.noop),
+    ]
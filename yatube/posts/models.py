@@ -1,5 +1,8 @@
-from django.db import models
+from django.db import connections, models, transaction
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from .storage import ContentAddressedStorage
 
 
 User = get_user_model()
@@ -21,6 +24,18 @@ class Group(models.Model):
         max_length=200,
         verbose_name='Опиисание',
     )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество публикаций',
+    )
+    last_post_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        db_index=True,
+        editable=False,
+        verbose_name='Дата последней публикации',
+    )
 
     class Meta:
         default_related_name = 'group'
@@ -29,6 +44,46 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    """Выборки публикаций для лент и страниц постов"""
+
+    def feed(self):
+        """Посты вместе с автором и группой одним запросом."""
+        return self.select_related('author', 'group')
+
+    def bulk_create_dated(self, posts, batch_size=None):
+        """bulk_create, сохраняющий pub_date, заданный в самих постах.
+
+        Строки вставляются с raw=True, как в save_base(raw=True) и
+        loaddata: auto_now_add и auto_now не подменяют даты, и каждая
+        строка пишется одним INSERT. Не заданные даты заполняются здесь.
+        """
+        now = timezone.now()
+        for post in posts:
+            if post.pub_date is None:
+                post.pub_date = now
+            if post.updated_at is None:
+                post.updated_at = post.pub_date
+        fields = [
+            field for field in self.model._meta.concrete_fields
+            if not isinstance(field, models.AutoField)
+        ]
+        ops = connections[self.db].ops
+        batch_size = batch_size or max(ops.bulk_batch_size(fields, posts), 1)
+        with transaction.atomic(using=self.db, savepoint=False):
+            for start in range(0, len(posts), batch_size):
+                self._insert(
+                    posts[start:start + batch_size],
+                    fields=fields,
+                    raw=True,
+                    using=self.db,
+                )
+        for post in posts:
+            post._state.adding = False
+            post._state.db = self.db
+        return posts
+
+
 class Post(models.Model):
     """Класс модели публикаций"""
 
@@ -40,6 +95,10 @@ class Post(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации',
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -56,13 +115,153 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
-        blank=True
+        storage=ContentAddressedStorage(),
+        blank=True,
+        db_index=True,
     )
+    # Сведения о картинке сохраняются при загрузке, чтобы шаблоны и API
+    # не открывали файл ради размеров
+    image_width = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Ширина картинки',
+    )
+    image_height = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Высота картинки',
+    )
+    image_size = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name='Размер картинки, байт',
+    )
+    image_placeholder = models.CharField(
+        max_length=7,
+        blank=True,
+        editable=False,
+        verbose_name='Цвет-заглушка картинки',
+        help_text='Средний цвет картинки в виде #rrggbb',
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         default_related_name = 'posts'
-        ordering = ['-pub_date']
+        ordering = ['-pub_date', '-id']
+        indexes = [
+            # Индексы под ленты: главная, группа и профиль автора
+            models.Index(
+                fields=['pub_date', 'id'],
+                name='posts_post_pub_date_id_idx',
+            ),
+            models.Index(
+                fields=['group', 'pub_date', 'id'],
+                name='posts_post_group_pub_id_idx',
+            ),
+            models.Index(
+                fields=['author', 'pub_date', 'id'],
+                name='posts_post_author_pub_id_idx',
+            ),
+        ]
 
     def __str__(self) -> str:
         max_length_of_text = 15
         return self.text[:max_length_of_text]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Исходные автор и группа нужны сигналам, чтобы перенести счётчики,
+        # а исходная картинка - чтобы освободить её файл после замены
+        instance._loaded_values = {
+            field: instance.__dict__[field]
+            for field in ('author_id', 'group_id', 'image')
+            if field in instance.__dict__
+        }
+        return instance
+
+
+class StoredImage(models.Model):
+    """Число ссылок на файл в хранилище картинок постов"""
+
+    name = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name='Имя файла',
+    )
+    references = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число ссылок',
+    )
+
+    class Meta:
+        verbose_name = 'Файл картинки'
+        verbose_name_plural = 'Файлы картинок'
+
+    def __str__(self):
+        return f'{self.name}: {self.references}'
+
+
+class AuthorStats(models.Model):
+    """Денормализованные счётчики публикаций автора"""
+
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='post_stats',
+        verbose_name='Автор',
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество публикаций',
+    )
+    last_post_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Дата последней публикации',
+    )
+
+    class Meta:
+        verbose_name = 'Статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+    def __str__(self):
+        return f'{self.author}: {self.posts_count}'
+
+    @classmethod
+    def for_author(cls, author):
+        """Счётчики автора; пустые, если он ещё ничего не публиковал."""
+        try:
+            return author.post_stats
+        except cls.DoesNotExist:
+            return cls(author=author)
+
+
+class ImportCheckpoint(models.Model):
+    """Сколько записей источника уже импортировано командой import_posts"""
+
+    name = models.CharField(
+        max_length=255,
+        unique=True,
+        verbose_name='Источник',
+    )
+    position = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Обработано записей',
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+    )
+
+    class Meta:
+        verbose_name = 'Точка продолжения импорта'
+        verbose_name_plural = 'Точки продолжения импорта'
+
+    def __str__(self) -> str:
+        return f'{self.name}: {self.position}'
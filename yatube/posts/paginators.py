@@ -0,0 +1,186 @@
+"""Курсорная (keyset) пагинация лент публикаций.
+
+Вместо LIMIT/OFFSET страница выбирается условием по паре
+(pub_date, id) последней показанной записи, поэтому глубокие страницы
+стоят столько же, сколько первая, а COUNT(*) не выполняется вовсе.
+"""
+import base64
+import binascii
+from collections.abc import Sequence
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+
+FORWARD = 'n'
+BACKWARD = 'p'
+ELLIPSIS = '…'
+# Диапазон AutoField: больший id переполняет параметр запроса в базе
+MAX_PK = 2 ** 31 - 1
+
+
+class InvalidCursor(Exception):
+    """Курсор не удалось разобрать."""
+
+
+def encode_cursor(direction, pub_date, pk) -> str:
+    raw = f'{direction}|{pub_date.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """(направление, pub_date, id) из курсора; InvalidCursor при ошибке.
+
+    Время без часового пояса или вне диапазона datetime в UTC и id вне
+    диапазона AutoField тоже считаются ошибкой: такие значения нельзя
+    передать в запрос.
+    """
+    padding = '=' * (-len(token) % 4)
+    try:
+        raw = base64.urlsafe_b64decode(token + padding).decode()
+        direction, pub_date, pk = raw.split('|')
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as error:
+        raise InvalidCursor(token) from error
+    if (
+        direction not in (FORWARD, BACKWARD)
+        or pub_date is None
+        or timezone.is_naive(pub_date)
+        or not 0 < pk <= MAX_PK
+    ):
+        raise InvalidCursor(token)
+    try:
+        # Так время передаётся в запрос; у крайних дат выходит за datetime
+        pub_date = pub_date.astimezone(timezone.utc)
+    except OverflowError as error:
+        raise InvalidCursor(token) from error
+    return direction, pub_date, pk
+
+
+def _key(obj):
+    """Ключ сортировки для модели или строки из values()."""
+    if isinstance(obj, dict):
+        return obj['pub_date'], obj['id']
+    return obj.pub_date, obj.pk
+
+
+def next_page_cursor(page):
+    """Курсор страницы, следующей за page обычного Paginator."""
+    if not page.has_next() or not len(page):
+        return None
+    return encode_cursor(FORWARD, *_key(page[len(page) - 1]))
+
+
+def elided_page_range(page, on_each_side=2, on_ends=1):
+    """Номера страниц вокруг текущей и по краям, пропуски — ELLIPSIS.
+
+    Длина результата не зависит от общего числа страниц, так что
+    пагинатор рендерится одинаково быстро для любой ленты.
+    """
+    number = page.number
+    num_pages = page.paginator.num_pages
+    window_start = max(number - on_each_side, 1)
+    window_end = min(number + on_each_side, num_pages)
+
+    if window_start > on_ends + 2:
+        yield from range(1, on_ends + 1)
+        yield ELLIPSIS
+    else:
+        window_start = 1
+    if window_end < num_pages - on_ends - 1:
+        yield from range(window_start, window_end + 1)
+        yield ELLIPSIS
+        yield from range(num_pages - on_ends + 1, num_pages + 1)
+    else:
+        yield from range(window_start, num_pages + 1)
+
+
+class CursorPage(Sequence):
+    """Страница курсорной пагинации с интерфейсом, похожим на Page."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, has_next, has_previous):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return encode_cursor(FORWARD, *_key(self.object_list[-1]))
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return encode_cursor(BACKWARD, *_key(self.object_list[0]))
+
+
+class CursorPaginator:
+    """Пагинатор по убыванию (pub_date, id) без OFFSET и COUNT(*)."""
+
+    def __init__(self, query_set, per_page):
+        self.query_set = query_set
+        self.per_page = int(per_page)
+
+    def page(self, cursor=None) -> CursorPage:
+        """Страница после (или до) курсора; InvalidCursor при ошибке."""
+        if not cursor:
+            return self._forward(self.query_set, has_previous=False)
+        direction, pub_date, pk = decode_cursor(cursor)
+        if direction == FORWARD:
+            query_set = self.query_set.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=pk)
+            )
+            return self._forward(query_set, has_previous=True)
+        query_set = self.query_set.filter(
+            Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, id__gt=pk)
+        )
+        return self._backward(query_set)
+
+    def get_page(self, cursor=None) -> CursorPage:
+        """Как page(), но некорректный курсор ведёт на первую страницу."""
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page()
+
+    def _forward(self, query_set, has_previous):
+        rows = list(
+            query_set.order_by('-pub_date', '-id')[:self.per_page + 1]
+        )
+        has_next = len(rows) > self.per_page
+        return CursorPage(rows[:self.per_page], has_next, has_previous)
+
+    def _backward(self, query_set):
+        rows = list(
+            query_set.order_by('pub_date', 'id')[:self.per_page + 1]
+        )
+        if not rows:
+            return self._forward(self.query_set, has_previous=False)
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        rows.reverse()
+        return CursorPage(rows, True, has_previous)
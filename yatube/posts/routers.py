@@ -0,0 +1,136 @@
+"""Чтение лент с реплик базы при записи только в основную.
+
+Представления, помеченные read_from_replica (ленты, страница поста,
+чтения API), отправляют SELECT на одну из баз POSTS_READ_REPLICAS. Все
+остальные запросы и любые записи идут в default. После записи клиент
+получает короткоживущую cookie: пока она есть, его чтения тоже идут в
+default, и автор сразу видит свой пост, даже если реплика отстаёт.
+
+Страницы, которые сохраняются в общий кэш, рендерятся по основной базе
+(primary_reads): иначе отставшая реплика попала бы в кэш под уже новым
+поколением и продержалась бы там до следующего изменения.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+PRIMARY_COOKIE = 'primary_reads'
+# Сессии читаются только из основной базы: иначе вход, записанный в
+# default, мог бы ещё не дойти до реплики
+PRIMARY_ONLY_APPS = {'sessions'}
+
+_routing = ContextVar('posts_routing', default=None)
+
+
+class Routing:
+    """Состояние маршрутизации текущего запроса."""
+
+    def __init__(self):
+        self.replica = None
+        self.wrote = False
+        self.read_replica = False
+
+
+class PrimaryReplicaRouter:
+    """Чтения помеченных представлений - на реплику, остальное - в default."""
+
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if (
+            routing is None
+            or routing.wrote
+            or model._meta.app_label in PRIMARY_ONLY_APPS
+            or routing.replica is None
+        ):
+            return None
+        routing.read_replica = True
+        return routing.replica
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None:
+            routing.wrote = True
+        # None оставляет Django выбор по подсказкам: default или база
+        # экземпляра, явно сохранённого через using
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная база
+        databases = {DEFAULT_DB_ALIAS, *settings.POSTS_READ_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReadYourWritesMiddleware:
+    """Отмечает клиентов, недавно писавших в базу, cookie PRIMARY_COOKIE."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        routing = Routing()
+        token = _routing.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        if routing.wrote and settings.POSTS_READ_REPLICAS:
+            response.set_cookie(
+                PRIMARY_COOKIE, '1',
+                max_age=settings.POSTS_REPLICA_LAG,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+
+def used_replica():
+    """Читал ли текущий запрос хоть что-то с реплики."""
+    routing = _routing.get()
+    return routing is not None and routing.read_replica
+
+
+@contextmanager
+def primary_reads():
+    """Направляет чтения внутри блока в основную базу."""
+    routing = _routing.get()
+    if routing is None:
+        yield
+        return
+    replica = routing.replica
+    routing.replica = None
+    try:
+        yield
+    finally:
+        routing.replica = replica
+
+
+def read_from_replica(view):
+    """Выполняет GET-представление на случайной реплике.
+
+    Клиенты с cookie PRIMARY_COOKIE и запросы вне ReadYourWritesMiddleware
+    читают из основной базы.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        routing = _routing.get()
+        replicas = settings.POSTS_READ_REPLICAS
+        if (
+            routing is None
+            or not replicas
+            or request.method not in ('GET', 'HEAD')
+            or PRIMARY_COOKIE in request.COOKIES
+        ):
+            return view(request, *args, **kwargs)
+        routing.replica = random.choice(replicas)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            routing.replica = None
+    return wrapper
@@ -0,0 +1,191 @@
+"""Полнотекстовый поиск по постам на SQLite FTS5.
+
+Таблица posts_post_fts хранит только индекс (external content) и
+синхронизируется с posts_post триггерами. SQLite пересоздаёт таблицу
+при изменении схемы и теряет триггеры, поэтому после каждой миграции
+они восстанавливаются (см. PostsConfig.ready).
+"""
+import re
+
+from django.db import connections
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Post
+
+
+FTS_TABLE = 'posts_post_fts'
+SNIPPET_TOKENS = 16
+# Маркеры подсветки, которые не встречаются в тексте постов: сниппет
+# экранируется целиком, а маркеры затем заменяются на <mark>
+MARK_START = '\x02'
+MARK_END = '\x03'
+
+CREATE_TABLE = f'''
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        text,
+        content='posts_post',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+'''
+CREATE_TRIGGERS = [
+    f'''
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai
+    AFTER INSERT ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad
+    AFTER DELETE ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF text ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    ''',
+]
+DROP_STATEMENTS = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+def is_supported(using='default'):
+    return connections[using].vendor == 'sqlite'
+
+
+def create_search_index(using='default'):
+    """Создаёт таблицу FTS5 и триггеры, если их ещё нет."""
+    if not is_supported(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(CREATE_TABLE)
+        for statement in CREATE_TRIGGERS:
+            cursor.execute(statement)
+
+
+def restore_search_triggers(using='default'):
+    """Возвращает триггеры, если таблица индекса уже создана миграцией."""
+    if not is_supported(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+            [FTS_TABLE],
+        )
+        if cursor.fetchone() is None:
+            return
+        for statement in CREATE_TRIGGERS:
+            cursor.execute(statement)
+
+
+def drop_search_index(using='default'):
+    if not is_supported(using):
+        return
+    with connections[using].cursor() as cursor:
+        for statement in DROP_STATEMENTS:
+            cursor.execute(statement)
+
+
+def rebuild_search_index(using='default'):
+    """Перестраивает индекс по текущему содержимому posts_post."""
+    create_search_index(using)
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+        )
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')"
+        )
+
+
+def match_expression(query):
+    """Запрос пользователя в виде безопасного выражения MATCH.
+
+    Каждое слово берётся в кавычки, поэтому операторы FTS5 в тексте
+    запроса не работают и не вызывают синтаксических ошибок.
+    """
+    words = re.findall(r'\w+', query)
+    return ' '.join(f'"{word}"' for word in words)
+
+
+def highlight(snippet):
+    return mark_safe(
+        escape(snippet)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
+
+
+class SearchResults:
+    """Ленивая выборка результатов поиска для Paginator.
+
+    count() и срезы выполняются отдельными запросами к индексу:
+    сортировка по bm25, затем посты страницы загружаются одним запросом.
+    """
+
+    def __init__(self, query, using='default'):
+        self.match = match_expression(query)
+        self.using = using
+
+    def _execute(self, sql, params):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def count(self):
+        if not self.match:
+            return 0
+        return self._execute(
+            f'SELECT COUNT(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            [self.match],
+        )[0][0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        limit = index.stop - start
+        if not self.match or limit <= 0:
+            return []
+        rows = self._execute(
+            f'''
+            SELECT rowid, snippet({FTS_TABLE}, 0, %s, %s, '…', %s)
+            FROM {FTS_TABLE}
+            WHERE {FTS_TABLE} MATCH %s
+            ORDER BY bm25({FTS_TABLE})
+            LIMIT %s OFFSET %s
+            ''',
+            [MARK_START, MARK_END, SNIPPET_TOKENS, self.match, limit, start],
+        )
+        posts = Post.objects.using(self.using).feed().in_bulk(
+            [pk for pk, _ in rows]
+        )
+        results = []
+        for pk, snippet in rows:
+            post = posts.get(pk)
+            if post is not None:
+                post.snippet = highlight(snippet)
+                results.append(post)
+        return results
+
+
+def matching_ids_sql(query):
+    """SQL и параметры подзапроса id постов, подходящих под query."""
+    return (
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        [match_expression(query)],
+    )
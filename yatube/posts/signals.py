@@ -0,0 +1,234 @@
+"""Поддержка счётчиков, кэша и файлов картинок при изменении постов."""
+from django.db import transaction
+from django.db.models import Case, F, OuterRef, Subquery, Value, When
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+from PIL import Image
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+from .caching import (GLOBAL_SCOPE, author_data_scope, author_scope,
+                      bump_generations, group_data_scope, group_scope,
+                      post_scope, username_scope)
+from .images import image_metadata
+from .models import AuthorStats, Group, Post, User
+
+
+def latest_pub_date(**lookup):
+    """Подзапрос даты самого свежего поста, подходящего под lookup."""
+    return Subquery(
+        Post.objects.filter(**lookup)
+        .order_by('-pub_date', '-id')
+        .values('pub_date')[:1]
+    )
+
+
+def counters_added(pub_date, count=1):
+    """Изменения счётчиков при появлении count постов, новейший - pub_date."""
+    return {
+        'posts_count': F('posts_count') + count,
+        'last_post_at': Case(
+            When(last_post_at__gte=pub_date, then=F('last_post_at')),
+            default=Value(pub_date),
+        ),
+    }
+
+
+def author_posted(author_id, pub_date, count=1):
+    AuthorStats.objects.get_or_create(author_id=author_id)
+    AuthorStats.objects.filter(author_id=author_id).update(
+        **counters_added(pub_date, count)
+    )
+
+
+def author_unposted(author_id):
+    AuthorStats.objects.filter(author_id=author_id).update(
+        posts_count=F('posts_count') - 1,
+        last_post_at=latest_pub_date(author=OuterRef('author')),
+    )
+
+
+def group_posted(group_id, pub_date, count=1):
+    if group_id is not None:
+        Group.objects.filter(pk=group_id).update(
+            **counters_added(pub_date, count)
+        )
+
+
+def group_unposted(group_id):
+    if group_id is not None:
+        Group.objects.filter(pk=group_id).update(
+            posts_count=F('posts_count') - 1,
+            last_post_at=latest_pub_date(group=OuterRef('pk')),
+        )
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    loaded = getattr(instance, '_loaded_values', {})
+    loaded_author_id = loaded.get('author_id', instance.author_id)
+    loaded_group_id = loaded.get('group_id', instance.group_id)
+    if created:
+        author_posted(instance.author_id, instance.pub_date)
+        group_posted(instance.group_id, instance.pub_date)
+    else:
+        if loaded_author_id != instance.author_id:
+            author_unposted(loaded_author_id)
+            author_posted(instance.author_id, instance.pub_date)
+        if loaded_group_id != instance.group_id:
+            group_unposted(loaded_group_id)
+            group_posted(instance.group_id, instance.pub_date)
+    bump_generations(
+        GLOBAL_SCOPE,
+        post_scope(instance.pk),
+        author_scope(loaded_author_id),
+        author_scope(instance.author_id),
+        group_scope(loaded_group_id),
+        group_scope(instance.group_id),
+    )
+    instance._loaded_values = {
+        **loaded,
+        'author_id': instance.author_id,
+        'group_id': instance.group_id,
+    }
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    author_unposted(instance.author_id)
+    group_unposted(instance.group_id)
+    bump_generations(
+        GLOBAL_SCOPE,
+        post_scope(instance.pk),
+        author_scope(instance.author_id),
+        group_scope(instance.group_id),
+    )
+
+
+@receiver(pre_save, sender=Post)
+def store_image_metadata(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    image = instance.image
+    if not image:
+        instance.image_width = instance.image_height = None
+        instance.image_size = None
+        instance.image_placeholder = ''
+        return
+    if image._committed:
+        if instance.image_width is not None:
+            return
+        metadata = None
+    else:
+        # Загрузку уже открывал ingest_image (PostForm): метаданные
+        # берутся оттуда, без повторного декодирования
+        metadata = getattr(image.file, 'image_metadata', None)
+    if metadata is None:
+        try:
+            metadata = image_metadata(image)
+        except (Image.DecompressionBombError, OSError):
+            return
+    for field, value in metadata.items():
+        setattr(instance, field, value)
+
+
+def release_image(field_file):
+    """Снимает ссылку поста на файл картинки (см. storage.release).
+
+    Если файл удалён, удаляются и его миниатюры.
+    """
+    name = field_file.name
+    if not name:
+        return
+    with transaction.atomic():
+        if field_file.storage.release(name):
+            # Удаляет файлы миниатюр и записи о них в хранилище ключей sorl
+            default.kvstore.delete(ImageFile(field_file))
+
+
+def release_image_on_commit(field_file):
+    # Ссылку снимаем только после коммита: при откате она ещё нужна
+    transaction.on_commit(lambda: release_image(field_file))
+
+
+@receiver(pre_save, sender=Post)
+def mark_image_upload(sender, instance, raw=False, **kwargs):
+    # Новая загрузка сохраняется в хранилище уже после pre_save
+    instance._image_uploaded = (
+        not raw and bool(instance.image) and not instance.image._committed
+    )
+
+
+@receiver(post_save, sender=Post)
+def release_replaced_image(sender, instance, created, raw=False, **kwargs):
+    loaded = getattr(instance, '_loaded_values', {})
+    if raw or created or 'image' not in loaded:
+        return
+    if loaded['image'] and loaded['image'] != instance.image.name:
+        release_image_on_commit(
+            instance.image.field.attr_class(
+                instance, instance.image.field, loaded['image']
+            )
+        )
+    elif (
+        getattr(instance, '_image_uploaded', False)
+        and loaded['image'] == instance.image.name
+    ):
+        # Те же байты загружены заново: save() хранилища добавил ссылку,
+        # а пост по-прежнему ссылается на файл один раз
+        release_image_on_commit(instance.image)
+    instance._loaded_values = {**loaded, 'image': instance.image.name}
+
+
+@receiver(post_delete, sender=Post)
+def release_deleted_image(sender, instance, **kwargs):
+    if instance.image:
+        release_image_on_commit(instance.image)
+
+
+@receiver([post_save, pre_delete], sender=Group)
+def invalidate_group_pages(sender, instance, raw=False, created=False,
+                           **kwargs):
+    # Название и slug группы выводятся на главной странице и в профилях
+    # всех, кто в ней писал. При удалении авторов ищем до того, как у
+    # постов обнулится группа
+    if raw:
+        return
+    author_ids = [] if created else (
+        Post.objects.filter(group=instance).order_by()
+        .values_list('author_id', flat=True).distinct()
+    )
+    bump_generations(
+        GLOBAL_SCOPE,
+        group_scope(instance.pk),
+        group_data_scope(instance.pk),
+        *[author_scope(author_id) for author_id in author_ids],
+    )
+
+
+@receiver([post_save, pre_delete], sender=User)
+def invalidate_author_pages(sender, instance, raw=False, created=False,
+                            update_fields=None, **kwargs):
+    # Вход пользователя обновляет только last_login, страниц это не меняет
+    if raw or update_fields == frozenset({'last_login'}):
+        return
+    # Профиль и его лента закэшированы и по имени: новое, удалённое или
+    # занятое другим пользователем имя должно их сбросить
+    if created:
+        bump_generations(username_scope(instance.username))
+        return
+    # Имя автора выводится в карточках на главной и в лентах его групп
+    group_ids = (
+        Post.objects.filter(author=instance, group__isnull=False)
+        .order_by().values_list('group_id', flat=True).distinct()
+    )
+    bump_generations(
+        GLOBAL_SCOPE,
+        author_scope(instance.pk),
+        author_data_scope(instance.pk),
+        username_scope(instance.username),
+        *[group_scope(group_id) for group_id in group_ids],
+    )
@@ -0,0 +1,123 @@
+"""Хранилище картинок постов с адресацией по содержимому.
+
+Файл называется SHA-256 своего содержимого и лежит в подкаталогах по
+первым символам хеша: posts/ab/cd/abcd….jpg. Расширение берётся из
+формата картинки, а не из имени загрузки, поэтому одинаковые картинки
+хранятся один раз, а их миниатюры sorl-thumbnail, чьи имена зависят от
+имени исходного файла, создаются тоже один раз.
+
+Ссылки на файл считаются в StoredImage: save() добавляет ссылку ещё до
+того, как пост с этой картинкой записан в базу, а release() снимает её
+и удаляет файл, только когда не осталось ни ссылок, ни постов с этим
+именем. Счётчик меняется в той же транзакции, что и файл, поэтому
+загрузка тех же байт, пришедшая во время удаления, ждёт его конца и
+записывает файл заново, а не получает имя удаляемого файла.
+"""
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+from PIL import Image
+
+
+HASH_CHUNK_SIZE = 64 * 1024
+# Формат Pillow -> расширение, если оно отличается от имени формата
+FORMAT_EXTENSIONS = {
+    'JPEG': '.jpg',
+    'MPO': '.jpg',
+    'TIFF': '.tif',
+}
+
+
+def image_extension(name, content):
+    """Расширение файла по формату картинки, а не по имени загрузки."""
+    try:
+        with Image.open(content) as image:
+            image_format = image.format
+    except (Image.DecompressionBombError, OSError):
+        image_format = None
+    finally:
+        content.seek(0)
+    if image_format is None:
+        return os.path.splitext(name)[1].lower()
+    return FORMAT_EXTENSIONS.get(image_format, '.' + image_format.lower())
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+
+    def content_name(self, name, content):
+        """Имя файла по хешу содержимого в каталоге исходного имени."""
+        digest = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+        content.seek(0)
+        key = digest.hexdigest()
+        return os.path.join(
+            os.path.dirname(name),
+            key[:2],
+            key[2:4],
+            key + image_extension(name, content),
+        ).replace('\\', '/')
+
+    def claim(self, name, count=1):
+        """Добавляет count ссылок на файл name; False, если он не учтён.
+
+        Нужно и тем, кто записывает имя в посты в обход save(), например
+        через bulk_create.
+        """
+        # models импортирует это хранилище, поэтому модель - при вызове
+        from .models import StoredImage
+        return StoredImage.objects.filter(name=name).update(
+            references=F('references') + count
+        ) > 0
+
+    def save(self, name, content, max_length=None):
+        from .models import StoredImage
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.content_name(name, content)
+        with transaction.atomic():
+            if self.claim(name):
+                # Такие же байты уже сохранены: переиспользуем файл
+                return name
+            try:
+                with transaction.atomic():
+                    StoredImage.objects.create(name=name, references=1)
+            except IntegrityError:
+                # Те же байты одновременно сохранила другая загрузка
+                self.claim(name)
+                return name
+            if self.exists(name):
+                return name
+            return super().save(name, content, max_length)
+
+    def release(self, name):
+        """Снимает ссылку на файл name и удаляет его, если он не нужен.
+
+        Файл остаётся, пока на него есть ссылки или посты с этим именем
+        (их могли записать в обход save(), например bulk_create). Вернёт
+        True, если файл удалён.
+        """
+        from .models import Post, StoredImage
+        with transaction.atomic():
+            StoredImage.objects.filter(name=name, references__gt=0).update(
+                references=F('references') - 1
+            )
+            if (
+                StoredImage.objects.filter(
+                    name=name, references__gt=0
+                ).exists()
+                or Post.objects.filter(image=name).exists()
+            ):
+                return False
+            StoredImage.objects.filter(name=name).delete()
+            self.delete(name)
+            return True
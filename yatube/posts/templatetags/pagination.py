@@ -0,0 +1,27 @@
+from django import template
+
+from ..paginators import ELLIPSIS
+
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def query_replace(context, **params):
+    """Строка запроса текущей страницы с заменёнными параметрами.
+
+    Номер страницы и курсор взаимоисключают друг друга, поэтому при
+    замене одного из них второй убирается.
+    """
+    query = context['request'].GET.copy()
+    for name in ('page', 'cursor'):
+        query.pop(name, None)
+    for name, value in params.items():
+        query[name] = value
+    return '?' + query.urlencode()
+
+
+@register.filter
+def is_ellipsis(value):
+    """Пропуск ли это в списке номеров страниц (см. elided_page_range)."""
+    return value == ELLIPSIS
@@ -0,0 +1,48 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+
+from ..caching import count_fragment, post_card_key
+
+
+register = template.Library()
+
+
+class PostCardCacheNode(template.Node):
+
+    def __init__(self, nodelist, post, variant):
+        self.nodelist = nodelist
+        self.post = post
+        self.variant = variant
+
+    def render(self, context):
+        post = self.post.resolve(context)
+        key = post_card_key(
+            post, self.variant.resolve(context), context.get('request')
+        )
+        value = cache.get(key)
+        count_fragment(hit=value is not None)
+        if value is None:
+            value = self.nodelist.render(context)
+            cache.set(key, value, settings.POSTS_FRAGMENT_CACHE_TIMEOUT)
+        return value
+
+
+@register.tag
+def cache_post_card(parser, token):
+    """Кэширует разметку карточки поста (ключ см. caching.post_card_key).
+
+    {% cache_post_card post 'index' %} ... {% endcache_post_card %}
+    """
+    bits = token.split_contents()
+    if len(bits) != 3:
+        raise template.TemplateSyntaxError(
+            f'{bits[0]} ожидает пост и вариант шаблона'
+        )
+    nodelist = parser.parse(('endcache_post_card',))
+    parser.delete_first_token()
+    return PostCardCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        parser.compile_filter(bits[2]),
+    )
@@ -0,0 +1,26 @@
+from django import template
+from sorl.thumbnail.helpers import toint
+from sorl.thumbnail.parsers import parse_geometry
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def thumbnail_size(post, geometry, crop=False, upscale=False):
+    """Размер миниатюры картинки поста по размерам из полей Post.
+
+    Считается так же, как в sorl-thumbnail (масштаб, затем обрезка), но
+    без обращения к миниатюре. Для постов без размеров - None.
+    """
+    width, height = post.image_width, post.image_height
+    if not width or not height:
+        return None
+    box_width, box_height = parse_geometry(geometry, width / height)
+    factors = (box_width / width, box_height / height)
+    factor = max(factors) if crop else min(factors)
+    if factor < 1 or upscale:
+        width, height = toint(width * factor), toint(height * factor)
+    if crop:
+        width, height = min(width, box_width), min(height, box_height)
+    return width, height
@@ -0,0 +1,117 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils.dateparse import parse_datetime
+
+from ..models import Group, Post, User
+from ..paginators import FORWARD, encode_cursor
+
+
+POSTS_COUNT = 15
+
+
+class PostApiTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.author = User.objects.create_user(
+            username='TestAuthor', first_name='Имя'
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {number}', author=cls.author, group=cls.group
+            )
+            for number in range(POSTS_COUNT)
+        ]
+
+    def setUp(self) -> None:
+        self.client = Client()
+
+    def test_feed_is_one_query_per_page(self):
+        """Страница ленты API - один запрос с автором и группой"""
+        urls = [
+            reverse('posts:api_posts'),
+            reverse('posts:api_group_posts', args=[self.group.slug]),
+            reverse('posts:api_author_posts', args=[self.author.username]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                with self.assertNumQueries(1):
+                    data = self.client.get(url).json()
+                self.assertEqual(len(data['results']), 10)
+                first = data['results'][0]
+                self.assertEqual(first['id'], self.posts[-1].pk)
+                self.assertEqual(first['author'], 'TestAuthor')
+                self.assertEqual(first['group'], 'test-slug')
+
+    def test_cursor_walks_whole_feed(self):
+        url = reverse('posts:api_posts') + '?limit=4&fields=id'
+        seen = []
+        while url:
+            data = self.client.get(url).json()
+            seen.extend(row['id'] for row in data['results'])
+            url = data['next']
+        self.assertEqual(seen, [post.pk for post in reversed(self.posts)])
+
+    def test_previous_cursor(self):
+        first = self.client.get(reverse('posts:api_posts')).json()
+        second = self.client.get(first['next']).json()
+        self.assertEqual(self.client.get(second['previous']).json(), first)
+
+    def test_sparse_fieldsets(self):
+        response = self.client.get(
+            reverse('posts:api_posts'), {'fields': 'text,author_name'}
+        )
+        self.assertEqual(
+            response.json()['results'][0],
+            {'text': f'Пост {POSTS_COUNT - 1}', 'author_name': 'Имя'},
+        )
+
+    def test_post_detail(self):
+        post = self.posts[0]
+        response = self.client.get(
+            reverse('posts:api_post', args=[post.pk]),
+            {'fields': 'id,group_title,image'},
+        )
+        self.assertEqual(
+            response.json(),
+            {'id': post.pk, 'group_title': 'Тестовая группа', 'image': None},
+        )
+
+    def test_errors(self):
+        cases = {
+            reverse('posts:api_posts') + '?fields=password': 400,
+            reverse('posts:api_posts') + '?cursor=%%%': 400,
+            reverse('posts:api_posts') + '?cursor=' + encode_cursor(
+                FORWARD, parse_datetime('2024-01-01T00:00:00Z'), 10 ** 30
+            ): 400,
+            reverse('posts:api_posts') + '?cursor=' + encode_cursor(
+                FORWARD, parse_datetime('0001-01-01T00:00:00+05:00'), 1
+            ): 400,
+            reverse('posts:api_posts') + '?limit=1000': 400,
+            reverse('posts:api_post', args=[0]): 404,
+            reverse('posts:api_group_posts', args=['missing']): 404,
+            reverse('posts:api_author_posts', args=['missing']): 404,
+        }
+        for url, status in cases.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status)
+                self.assertIn('error', response.json())
+
+    def test_read_only(self):
+        response = self.client.post(reverse('posts:api_posts'))
+        self.assertEqual(response.status_code, 405)
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('bench_api', requests=1, stdout=out)
+        self.assertIn('json', out.getvalue())
@@ -0,0 +1,81 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from ..models import Group, Post, User
+
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class BenchUrlsTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.author = User.objects.create_user(username='TestAuthor')
+        Post.objects.create(text='Пост', author=cls.author, group=cls.group)
+        cls.baseline = os.path.join(TEMP_DIR, 'baseline.json')
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def bench(self, **options):
+        out, err = StringIO(), StringIO()
+        call_command(
+            'bench_urls', requests=2, stdout=out, stderr=err, **options
+        )
+        return out.getvalue()
+
+    def test_baseline_covers_every_route(self):
+        self.bench(save=self.baseline)
+        with open(self.baseline, encoding='utf-8') as source:
+            results = json.load(source)
+        for key in (
+            'posts:index anonymous',
+            'posts:post_edit user',
+            'posts:api_post anonymous',
+            'users:login anonymous',
+            'about:tech user',
+        ):
+            self.assertIn(key, results)
+        result = results['posts:post_edit user']
+        self.assertEqual(result['status'], 200)
+        self.assertGreater(result['queries'], 0)
+        self.assertGreater(result['bytes'], 0)
+        self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+        self.assertEqual(results['posts:post_edit anonymous']['status'], 302)
+
+    def test_regression_against_baseline_fails(self):
+        self.bench(save=self.baseline)
+        out = self.bench(baseline=self.baseline, threshold=100)
+        self.assertIn('Регрессий относительно базовой линии нет', out)
+
+        with open(self.baseline, encoding='utf-8') as source:
+            results = json.load(source)
+        results['posts:post_detail user']['queries'] -= 1
+        results['about:tech anonymous']['p95_ms'] = 0.0
+        with open(self.baseline, 'w', encoding='utf-8') as target:
+            json.dump(results, target)
+        with self.assertRaisesMessage(CommandError, 'posts:post_detail user'):
+            self.bench(baseline=self.baseline, min_delta_ms=0)
+        with self.assertRaisesMessage(CommandError, 'about:tech anonymous'):
+            self.bench(baseline=self.baseline, min_delta_ms=0)
+
+    def test_requires_seeded_data(self):
+        Post.objects.all().delete()
+        with self.assertRaisesMessage(CommandError, 'manage.py seed'):
+            self.bench()
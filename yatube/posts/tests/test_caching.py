@@ -0,0 +1,254 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..caching import fragment_stats
+from ..models import Group, Post, User
+
+
+INDEX = reverse('posts:index')
+
+
+class AnonymousPageCacheTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.another_group = Group.objects.create(
+            title='Другая группа',
+            slug='another-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый пост', author=cls.author, group=cls.group
+        )
+        cls.GROUP = reverse('posts:groups', kwargs={'slug': cls.group.slug})
+        cls.PAGES: list = [
+            INDEX,
+            cls.GROUP,
+            reverse('posts:profile', kwargs={'username': 'TestAuthor'}),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.pk}),
+        ]
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(AnonymousPageCacheTest.author)
+
+    def test_repeated_anonymous_request_is_cached(self):
+        """Повторный запрос гостя отдаётся из кэша без запросов к БД"""
+        for url in AnonymousPageCacheTest.PAGES:
+            with self.subTest(url=url):
+                first = self.guest_client.get(url)
+                with self.assertNumQueries(0):
+                    second = self.guest_client.get(url)
+                self.assertEqual(first.content, second.content)
+
+    def test_pages_are_cached_per_page_number(self):
+        self.guest_client.get(INDEX)
+        response = self.guest_client.get(INDEX + '?page=2')
+        self.assertIsNotNone(response.context)
+
+    def test_new_post_invalidates_feeds(self):
+        for url in AnonymousPageCacheTest.PAGES[:3]:
+            self.guest_client.get(url)
+        Post.objects.create(
+            text='Новый пост', author=self.author, group=self.group
+        )
+        for url in AnonymousPageCacheTest.PAGES[:3]:
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url), 'Новый пост')
+
+    def test_other_group_post_keeps_group_page(self):
+        """Пост в другой группе не сбрасывает кэш страницы группы"""
+        self.guest_client.get(AnonymousPageCacheTest.GROUP)
+        Post.objects.create(
+            text='Чужой пост', author=self.author, group=self.another_group
+        )
+        with self.assertNumQueries(0):
+            self.guest_client.get(AnonymousPageCacheTest.GROUP)
+
+    def test_post_edit_invalidates_detail(self):
+        url = AnonymousPageCacheTest.PAGES[3]
+        self.guest_client.get(url)
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Исправленный пост'
+        post.save()
+        self.assertContains(self.guest_client.get(url), 'Исправленный пост')
+
+    def test_author_change_invalidates_pages_with_their_posts(self):
+        for url in AnonymousPageCacheTest.PAGES:
+            self.guest_client.get(url)
+        author = User.objects.get(pk=self.author.pk)
+        author.first_name = 'Переименованный'
+        author.save()
+        for url in AnonymousPageCacheTest.PAGES:
+            with self.subTest(url=url):
+                self.assertIsNotNone(self.guest_client.get(url).context)
+
+    def test_group_change_invalidates_member_profiles(self):
+        profile = AnonymousPageCacheTest.PAGES[2]
+        group = Group.objects.get(pk=self.group.pk)
+        for change in (group.save, group.delete):
+            with self.subTest(change=change.__name__):
+                self.guest_client.get(profile)
+                change()
+                self.assertIsNotNone(self.guest_client.get(profile).context)
+
+    def test_deleted_and_reused_username_invalidates_profile(self):
+        """Профиль по имени сбрасывается при удалении и новом владельце"""
+        User.objects.create_user(username='Reused')
+        url = reverse('posts:profile', kwargs={'username': 'Reused'})
+        first = self.guest_client.get(url)
+        User.objects.filter(username='Reused').delete()
+        self.assertTemplateUsed(self.guest_client.get(url), 'core/404.html')
+        reused = User.objects.create_user(username='Reused')
+        response = self.guest_client.get(
+            url, HTTP_IF_NONE_MATCH=first['ETag']
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['author'], reused)
+
+    def test_authorized_requests_are_not_cached(self):
+        self.authorized_client.get(INDEX)
+        response = self.authorized_client.get(INDEX)
+        self.assertIsNotNone(response.context)
+
+
+class FileBasedPageCacheTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.cache_dir = tempfile.mkdtemp()
+        cls.author = User.objects.create_user(username='TestAuthor')
+        Post.objects.create(text='Тестовый пост', author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(cls.cache_dir, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_file_based_backend(self):
+        caches = {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.'
+                           'FileBasedCache',
+                'LOCATION': self.cache_dir,
+            }
+        }
+        with override_settings(CACHES=caches):
+            guest_client = Client()
+            guest_client.get(INDEX)
+            with self.assertNumQueries(0):
+                guest_client.get(INDEX)
+            Post.objects.create(text='Новый пост', author=self.author)
+            self.assertContains(guest_client.get(INDEX), 'Новый пост')
+
+
+@override_settings(POSTS_FRAGMENT_STATS_RATE=1)
+class PostCardCacheTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(text=f'Пост {number}', author=cls.author)
+            for number in range(3)
+        ]
+        cls.posts[0].group = cls.group
+        cls.posts[0].save()
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(PostCardCacheTest.author)
+
+    def test_cards_are_rendered_once(self):
+        """Повторный рендер ленты берёт карточки из кэша"""
+        self.authorized_client.get(INDEX)
+        self.assertEqual(fragment_stats(), {'hits': 0, 'misses': 3})
+        self.authorized_client.get(INDEX)
+        self.assertEqual(fragment_stats(), {'hits': 3, 'misses': 3})
+
+    def test_variants_are_cached_separately(self):
+        self.authorized_client.get(INDEX)
+        self.authorized_client.get(
+            reverse('posts:profile', kwargs={'username': 'TestAuthor'})
+        )
+        self.assertEqual(fragment_stats(), {'hits': 0, 'misses': 6})
+
+    def test_edited_post_card_is_rendered_again(self):
+        self.authorized_client.get(INDEX)
+        post = Post.objects.get(pk=self.posts[0].pk)
+        post.text = 'Исправленный пост'
+        post.save()
+        response = self.authorized_client.get(INDEX)
+        self.assertContains(response, 'Исправленный пост')
+        self.assertEqual(fragment_stats(), {'hits': 2, 'misses': 4})
+
+    def test_author_and_group_changes_render_cards_again(self):
+        profile = reverse('posts:profile', kwargs={'username': 'TestAuthor'})
+        self.authorized_client.get(profile)
+        author = User.objects.get(pk=self.author.pk)
+        author.first_name = 'Переименованный'
+        author.save()
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = 'renamed-slug'
+        group.save()
+        response = self.authorized_client.get(profile)
+        self.assertContains(response, 'Автор: Переименованный', count=3)
+        self.assertContains(
+            response, reverse('posts:groups', args=['renamed-slug'])
+        )
+        self.assertEqual(fragment_stats(), {'hits': 0, 'misses': 6})
+
+    def test_versions_are_loaded_once_per_page(self):
+        self.authorized_client.get(INDEX)
+        cache_calls = []
+        get_many = cache.get_many
+
+        def counting_get_many(keys, *args, **kwargs):
+            keys = list(keys)
+            cache_calls.append(keys)
+            return get_many(keys, *args, **kwargs)
+
+        with patch.object(cache, 'get_many', counting_get_many):
+            self.authorized_client.get(INDEX)
+        version_calls = [
+            keys for keys in cache_calls
+            if any('-data:' in key for key in keys)
+        ]
+        self.assertEqual(len(version_calls), 1)
+
+    @override_settings(POSTS_FRAGMENT_STATS_RATE=0)
+    def test_stats_are_sampled(self):
+        self.authorized_client.get(INDEX)
+        self.assertEqual(fragment_stats(), {'hits': 0, 'misses': 0})
+
+    def test_stats_command(self):
+        self.authorized_client.get(INDEX)
+        self.authorized_client.get(INDEX)
+        out = StringIO()
+        call_command('fragment_cache_stats', reset=True, stdout=out)
+        self.assertIn('Доля попаданий: 50.0%', out.getvalue())
+        self.assertEqual(fragment_stats(), {'hits': 0, 'misses': 0})
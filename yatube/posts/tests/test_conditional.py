@@ -0,0 +1,157 @@
+import time
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Group, Post, User
+
+
+class ConditionalGetTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.post = Post.objects.create(
+            text='Тестовый пост', author=cls.author, group=cls.group
+        )
+        cls.URLS: list = [
+            reverse('posts:index'),
+            reverse('posts:groups', kwargs={'slug': cls.group.slug}),
+            reverse(
+                'posts:profile', kwargs={'username': cls.author.username}
+            ),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.pk}),
+        ]
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ConditionalGetTest.author)
+
+    def test_validators_sent(self):
+        for url in ConditionalGetTest.URLS:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertTrue(response.has_header('ETag'))
+                self.assertTrue(response.has_header('Last-Modified'))
+                self.assertIn('no-cache', response['Cache-Control'])
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }})
+    def test_no_validators_with_process_local_cache(self):
+        """С кэшем своего процесса поколения не годятся в валидаторы"""
+        urls = ConditionalGetTest.URLS + [
+            reverse('posts:index_feed'),
+            reverse('posts:author_feed', args=[self.author.username]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertFalse(response.has_header('ETag'))
+                self.assertFalse(response.has_header('Last-Modified'))
+                response = self.authorized_client.get(
+                    url, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT'
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_matching_etag_returns_304(self):
+        """Повторный запрос с тем же ETag получает 304 без рендера"""
+        for client in (self.guest_client, self.authorized_client):
+            for url in ConditionalGetTest.URLS:
+                with self.subTest(url=url):
+                    etag = client.get(url)['ETag']
+                    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+                    self.assertEqual(response.status_code, 304)
+                    self.assertFalse(response.templates)
+
+    def test_cached_page_revalidated_without_queries(self):
+        url = reverse('posts:index')
+        etag = self.guest_client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_modified_since(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        last_modified = self.guest_client.get(url)['Last-Modified']
+        response = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes_produce_new_etag(self):
+        """Новый, изменённый или удалённый пост меняет ETag"""
+        url = reverse('posts:groups', kwargs={'slug': self.group.slug})
+        etags = [self.guest_client.get(url)['ETag']]
+        post = Post.objects.create(
+            text='Новый пост', author=self.author, group=self.group
+        )
+        etags.append(self.guest_client.get(url)['ETag'])
+        post.text = 'Изменённый пост'
+        post.save()
+        etags.append(self.guest_client.get(url)['ETag'])
+        post.delete()
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etags[-1])
+        self.assertEqual(response.status_code, 200)
+        etags.append(response['ETag'])
+        self.assertEqual(len(set(etags)), len(etags))
+
+    def test_author_change_produces_new_etag(self):
+        for url in ConditionalGetTest.URLS:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                author = User.objects.get(pk=self.author.pk)
+                author.first_name = f'Имя для {url}'
+                author.save()
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_delete_moves_last_modified(self):
+        url = reverse('posts:profile', kwargs={'username': 'TestAuthor'})
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        last_modified = self.guest_client.get(url)['Last-Modified']
+        # Last-Modified точен до секунды: удаление - секундой позже
+        later = time.time_ns() + 10 ** 9
+        with patch('posts.caching._new_generation', return_value=later):
+            post.delete()
+        response = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['Last-Modified'], last_modified)
+
+    def test_validators_need_no_post_queries(self):
+        """304 для авторизованного - только запросы сессии и пользователя"""
+        url = reverse('posts:index')
+        etag = self.authorized_client.get(url)['ETag']
+        with self.assertNumQueries(2):
+            response = self.authorized_client.get(
+                url, HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_depends_on_user(self):
+        url = reverse('posts:index')
+        self.assertNotEqual(
+            self.guest_client.get(url)['ETag'],
+            self.authorized_client.get(url)['ETag'],
+        )
+
+    def test_missing_objects_still_not_found(self):
+        response = self.guest_client.get(
+            reverse('posts:groups', kwargs={'slug': 'missing'})
+        )
+        self.assertTemplateUsed(response, 'core/404.html')
+        self.assertFalse(response.has_header('ETag'))
@@ -0,0 +1,167 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..caching import GLOBAL_SCOPE, author_scope, get_generations
+from ..models import AuthorStats, Group, Post, User
+
+
+class AuthorStatsTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.another_author = User.objects.create_user(username='Another')
+
+    def stats(self, author):
+        return AuthorStats.objects.get(author=author)
+
+    def test_create_and_delete_update_counter(self):
+        """Создание и удаление поста меняют счётчик автора"""
+        first = Post.objects.create(text='Первый', author=self.author)
+        second = Post.objects.create(text='Второй', author=self.author)
+        stats = self.stats(self.author)
+        self.assertEqual(stats.posts_count, 2)
+        self.assertEqual(stats.last_post_at, second.pub_date)
+
+        second.delete()
+        stats = self.stats(self.author)
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.last_post_at, first.pub_date)
+
+    def test_reassignment_moves_counter(self):
+        """Смена автора поста переносит счётчик"""
+        post = Post.objects.create(text='Пост', author=self.author)
+        post = Post.objects.get(pk=post.pk)
+        post.author = self.another_author
+        post.save()
+        self.assertEqual(self.stats(self.author).posts_count, 0)
+        self.assertIsNone(self.stats(self.author).last_post_at)
+        self.assertEqual(self.stats(self.another_author).posts_count, 1)
+
+    def test_edit_keeps_counter(self):
+        post = Post.objects.create(text='Пост', author=self.author)
+        post.text = 'Исправленный пост'
+        post.save()
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+
+    def test_profile_reads_counter(self):
+        Post.objects.create(text='Пост', author=self.author)
+        AuthorStats.objects.filter(author=self.author).update(posts_count=7)
+        response = Client().get(
+            reverse('posts:profile', kwargs={'username': 'TestAuthor'})
+        )
+        self.assertEqual(response.context['posts_count'], 7)
+
+    def test_command_verifies_and_rebuilds(self):
+        Post.objects.create(text='Пост', author=self.author)
+        AuthorStats.objects.filter(author=self.author).update(posts_count=5)
+        with self.assertRaises(CommandError):
+            call_command(
+                'rebuild_post_counters', verify=True, stdout=StringIO()
+            )
+        call_command('rebuild_post_counters', stdout=StringIO())
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        call_command('rebuild_post_counters', verify=True, stdout=StringIO())
+
+    def test_command_invalidates_pages(self):
+        """Исправленные счётчики сбрасывают кэш страниц автора"""
+        Post.objects.create(text='Пост', author=self.author)
+        AuthorStats.objects.filter(author=self.author).update(posts_count=5)
+        scopes = [GLOBAL_SCOPE, author_scope(self.author.pk)]
+        before = get_generations(scopes)
+        call_command('rebuild_post_counters', stdout=StringIO())
+        after = get_generations(scopes)
+        for scope in scopes:
+            self.assertNotEqual(before[scope], after[scope])
+
+
+class GroupStatsTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_superuser(
+            username='TestAuthor', email='author@example.com', password='pass'
+        )
+        cls.group = Group.objects.create(
+            title='Первая группа', slug='first', description='Описание'
+        )
+        cls.another_group = Group.objects.create(
+            title='Вторая группа', slug='second', description='Описание'
+        )
+
+    def setUp(self) -> None:
+        self.client = Client()
+        self.client.force_login(GroupStatsTest.author)
+
+    def counters(self, group):
+        group.refresh_from_db()
+        return group.posts_count, group.last_post_at
+
+    def test_create_and_delete_update_counter(self):
+        post = Post.objects.create(
+            text='Пост', author=self.author, group=self.group
+        )
+        self.assertEqual(self.counters(self.group), (1, post.pub_date))
+        post.delete()
+        self.assertEqual(self.counters(self.group), (0, None))
+
+    def test_post_edit_moves_counter(self):
+        """Перенос поста в другую группу через post_edit"""
+        post = Post.objects.create(
+            text='Пост', author=self.author, group=self.group
+        )
+        self.client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+            data={'text': 'Пост', 'group': self.another_group.pk},
+        )
+        self.assertEqual(self.counters(self.group), (0, None))
+        self.assertEqual(
+            self.counters(self.another_group), (1, post.pub_date)
+        )
+
+    def test_admin_list_editable_moves_counter(self):
+        """Перенос поста через редактируемую колонку в админке"""
+        post = Post.objects.create(
+            text='Пост', author=self.author, group=self.group
+        )
+        self.client.post(
+            reverse('admin:posts_post_changelist'),
+            data={
+                'form-TOTAL_FORMS': 1,
+                'form-INITIAL_FORMS': 1,
+                'form-0-id': post.pk,
+                'form-0-group': '',
+                '_save': 'Сохранить',
+            },
+        )
+        post.refresh_from_db()
+        self.assertIsNone(post.group)
+        self.assertEqual(self.counters(self.group), (0, None))
+
+    def test_group_index_orders_by_activity(self):
+        Post.objects.create(text='Пост', author=self.author, group=self.group)
+        Post.objects.create(
+            text='Пост', author=self.author, group=self.another_group
+        )
+        response = self.client.get(reverse('posts:group_index'))
+        self.assertEqual(
+            list(response.context['page_obj']),
+            [self.another_group, self.group]
+        )
+        self.assertContains(response, 'Всего постов: 1')
+
+    def test_command_rebuilds_group_counters(self):
+        Post.objects.create(text='Пост', author=self.author, group=self.group)
+        Group.objects.filter(pk=self.group.pk).update(posts_count=3)
+        with self.assertRaises(CommandError):
+            call_command(
+                'rebuild_post_counters', verify=True, stdout=StringIO()
+            )
+        call_command('rebuild_post_counters', stdout=StringIO())
+        self.assertEqual(self.counters(self.group)[0], 1)
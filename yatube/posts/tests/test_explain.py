@@ -0,0 +1,87 @@
+from django.db import connection
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post, User
+
+
+POSTS_COUNT = 30
+POST_TABLE = Post._meta.db_table
+
+
+class PostQueryPlanTest(TestCase):
+    """Запросы лент используют индексы, а не сортировку и полный скан"""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.author = User.objects.create_user(username='TestAuthor')
+        for number in range(POSTS_COUNT):
+            Post.objects.create(
+                text=f'Пост {number}', author=cls.author, group=cls.group
+            )
+        cls.FEED_URLS: list = [
+            reverse('posts:index'),
+            reverse('posts:groups', kwargs={'slug': cls.group.slug}),
+            reverse(
+                'posts:profile', kwargs={'username': cls.author.username}
+            ),
+        ]
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.guest_client = Client()
+
+    def post_queries(self, url):
+        """SQL всех SELECT по таблице постов, выполненных страницей."""
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT')
+            and f'"{POST_TABLE}"' in query['sql']
+        ]
+
+    def query_plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertUsesIndexes(self, url):
+        queries = self.post_queries(url)
+        self.assertTrue(queries, f'{url} не выполняет запросов к постам')
+        for sql in queries:
+            plan = self.query_plan(sql)
+            details = '\n'.join([sql] + plan)
+            for step in plan:
+                self.assertNotIn('TEMP B-TREE', step, details)
+                if step.startswith('SCAN') and POST_TABLE in step:
+                    self.assertIn('INDEX', step, details)
+
+    def test_feed_pages_use_indexes(self):
+        """Страницы лент по номеру не сортируют и не сканируют таблицу"""
+        for url in PostQueryPlanTest.FEED_URLS:
+            for page in ('', '?page=2'):
+                with self.subTest(url=url + page):
+                    self.assertUsesIndexes(url + page)
+
+    def test_cursor_pages_use_indexes(self):
+        """Курсорные страницы лент используют индексы в обе стороны"""
+        for url in PostQueryPlanTest.FEED_URLS:
+            first = self.guest_client.get(url + '?cursor=')
+            second = self.guest_client.get(
+                url + '?cursor=' + first.context['page_obj'].next_cursor
+            )
+            previous_cursor = second.context['page_obj'].previous_cursor
+            for query in ('?cursor=', '?cursor=' + previous_cursor):
+                with self.subTest(url=url + query):
+                    self.assertUsesIndexes(url + query)
@@ -0,0 +1,141 @@
+import csv
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post, User
+
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class ExportTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.staff = User.objects.create_user(
+            username='Staff', is_staff=True
+        )
+        cls.posts = []
+        for day, text in enumerate(('Первый', 'Второй\nпост', 'Третий'), 1):
+            post = Post.objects.create(
+                text=text,
+                author=cls.author,
+                group=cls.group if day != 2 else None,
+            )
+            # pub_date выставляется автоматически при создании
+            post.pub_date = datetime(2020, 1, day, tzinfo=timezone.utc)
+            post.save()
+            cls.posts.append(post)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def run_export(self, *args, **options):
+        out, err = StringIO(), StringIO()
+        call_command('export_posts', *args, stdout=out, stderr=err,
+                     **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_jsonl_export_of_posts(self):
+        out, err = self.run_export(chunk_size=1)
+        records = [json.loads(line) for line in out.splitlines()]
+        self.assertEqual(
+            [record['id'] for record in records],
+            [post.pk for post in self.posts],
+        )
+        self.assertEqual(records[0]['author'], 'TestAuthor')
+        self.assertEqual(records[0]['group'], 'test-slug')
+        self.assertIsNone(records[1]['group'])
+        self.assertEqual(records[1]['text'], 'Второй\nпост')
+        self.assertEqual(
+            records[0]['pub_date'], '2020-01-01T00:00:00Z'
+        )
+        self.assertIn('Выгружено записей: 3', err)
+
+    def test_since_id_and_date(self):
+        out, _ = self.run_export(since=str(self.posts[0].pk))
+        self.assertEqual(
+            [json.loads(line)['id'] for line in out.splitlines()],
+            [post.pk for post in self.posts[1:]],
+        )
+        out, _ = self.run_export(since='2020-01-02T00:00:00')
+        self.assertEqual(
+            [json.loads(line)['id'] for line in out.splitlines()],
+            [self.posts[2].pk],
+        )
+
+    def test_gzip_csv_file(self):
+        path = os.path.join(TEMP_DIR, 'posts.csv.gz')
+        _, err = self.run_export(path, format='csv', gzip=True)
+        self.assertIn('Выгружено записей: 3', err)
+        with gzip.open(path, 'rt', encoding='utf-8', newline='') as result:
+            rows = list(csv.DictReader(result))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[1]['text'], 'Второй\nпост')
+        self.assertEqual(rows[1]['group'], '')
+        self.assertEqual(rows[0]['pub_date'], '2020-01-01T00:00:00+00:00')
+
+    def test_other_tables(self):
+        out, _ = self.run_export(table='groups')
+        group = json.loads(out)
+        self.assertEqual(group['slug'], 'test-slug')
+        self.assertEqual(group['posts_count'], 2)
+        out, _ = self.run_export(table='users', since=str(self.author.pk))
+        self.assertEqual(json.loads(out)['username'], 'Staff')
+
+    def test_endpoint_is_staff_only(self):
+        url = reverse('posts:export', args=['posts'])
+        response = Client().get(url)
+        self.assertRedirects(
+            response, f'{reverse("admin:login")}?next={url}'
+        )
+        client = Client()
+        client.force_login(self.author)
+        self.assertEqual(client.get(url).status_code, 302)
+
+    def test_endpoint_streams_export(self):
+        client = Client()
+        client.force_login(self.staff)
+        url = reverse('posts:export', args=['posts'])
+        response = client.get(url, {'since': self.posts[1].pk})
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            response['Content-Type'], 'application/x-ndjson; charset=utf-8'
+        )
+        records = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(json.loads(records[0])['id'], self.posts[2].pk)
+
+        response = client.get(url, {'format': 'csv', 'gzip': 1})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('posts.csv.gz', response['Content-Disposition'])
+        content = gzip.decompress(b''.join(response.streaming_content))
+        self.assertEqual(len(content.decode().splitlines()), 5)
+
+        for params in ({'format': 'xml'}, {'since': 'вчера'}):
+            self.assertEqual(client.get(url, params).status_code, 400)
+        self.assertEqual(
+            client.get(
+                reverse('posts:export', args=['groups']),
+                {'since': '2020-01-01'},
+            ).status_code,
+            400,
+        )
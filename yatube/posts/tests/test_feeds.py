@@ -0,0 +1,105 @@
+from xml.etree import ElementTree
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post, User
+
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+class AtomFeedTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.other = User.objects.create_user(username='Other')
+        cls.post = Post.objects.create(
+            text='Пост <b>в группе</b>', author=cls.author, group=cls.group
+        )
+        Post.objects.create(text='Пост без группы', author=cls.other)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = Client()
+
+    def entries(self, url):
+        response = self.client.get(url)
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            response['Content-Type'], 'application/atom+xml; charset=utf-8'
+        )
+        feed = ElementTree.fromstring(b''.join(response.streaming_content))
+        return [
+            entry.find(f'{ATOM}content').text
+            for entry in feed.iter(f'{ATOM}entry')
+        ]
+
+    def test_feeds_list_scope_entries(self):
+        self.assertEqual(
+            self.entries(reverse('posts:index_feed')),
+            ['Пост без группы', 'Пост <b>в группе</b>'],
+        )
+        self.assertEqual(
+            self.entries(reverse('posts:group_feed', args=['test-slug'])),
+            ['Пост <b>в группе</b>'],
+        )
+        self.assertEqual(
+            self.entries(reverse('posts:author_feed', args=['Other'])),
+            ['Пост без группы'],
+        )
+
+    def test_unchanged_feed_returns_304_without_queries(self):
+        """Неизменившаяся лента отвечает 304 по состоянию из кэша"""
+        url = reverse('posts:group_feed', args=['test-slug'])
+        response = self.client.get(url)
+        last_modified = response['Last-Modified']
+        b''.join(response.streaming_content)
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                url, HTTP_IF_MODIFIED_SINCE=last_modified
+            )
+        self.assertEqual(response.status_code, 304)
+
+    def test_new_post_refreshes_feed(self):
+        url = reverse('posts:author_feed', args=['TestAuthor'])
+        self.entries(url)
+        Post.objects.create(text='Свежий пост', author=self.author)
+        with self.assertNumQueries(2):
+            entries = self.entries(url)
+        self.assertEqual(entries[0], 'Свежий пост')
+
+    def test_missing_owner(self):
+        response = self.client.get(
+            reverse('posts:group_feed', args=['missing'])
+        )
+        self.assertTemplateUsed(response, 'core/404.html')
+
+    def test_deleted_and_reused_username(self):
+        """Лента автора сбрасывается, когда имя удалено или занято"""
+        User.objects.create_user(username='Reused', first_name='Прежний')
+        url = reverse('posts:author_feed', args=['Reused'])
+        b''.join(self.client.get(url).streaming_content)
+        User.objects.filter(username='Reused').delete()
+        self.assertTemplateUsed(self.client.get(url), 'core/404.html')
+        User.objects.create_user(username='Reused', first_name='Новый')
+        feed = ElementTree.fromstring(
+            b''.join(self.client.get(url).streaming_content)
+        )
+        self.assertEqual(
+            feed.find(f'{ATOM}title').text, 'Записи пользователя Новый'
+        )
+
+    def test_pages_link_their_feeds(self):
+        response = self.client.get(reverse('posts:groups', args=['test-slug']))
+        self.assertContains(
+            response, reverse('posts:group_feed', args=['test-slug'])
+        )
@@ -0,0 +1,217 @@
+import shutil
+import tempfile
+from importlib import import_module
+from io import BytesIO
+from unittest import mock
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from sorl.thumbnail import default
+
+from ..forms import PostForm
+from ..templatetags.post_images import thumbnail_size
+from ..models import Post, User
+
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+ORIENTATION = 0x0112
+
+
+def make_upload(size, image_format='JPEG', exif=None, name='photo.jpg',
+                color='red'):
+    buffer = BytesIO()
+    options = {'exif': exif} if exif is not None else {}
+    Image.new('RGB', size, color).save(buffer, format=image_format, **options)
+    return SimpleUploadedFile(
+        name, buffer.getvalue(), content_type='image/jpeg'
+    )
+
+
+def clean_image(upload):
+    form = PostForm(data={'text': 'Пост'}, files={'image': upload})
+    form.is_valid()
+    return form
+
+
+@override_settings(POSTS_IMAGE_MAX_SIZE=(200, 200),
+                   POSTS_IMAGE_MAX_PIXELS=1000 * 1000)
+class ImageIngestionTest(TestCase):
+
+    def test_small_image_kept_as_is(self):
+        upload = make_upload((100, 50))
+        form = clean_image(upload)
+        self.assertIs(form.cleaned_data['image'], upload)
+
+    def test_large_image_downscaled(self):
+        """Картинка больше POSTS_IMAGE_MAX_SIZE уменьшается с пропорциями"""
+        form = clean_image(make_upload((800, 400), name='big.jpeg'))
+        image = form.cleaned_data['image']
+        self.assertEqual(image.name, 'big.jpg')
+        self.assertEqual(Image.open(image).size, (200, 100))
+
+    def test_exif_stripped_and_orientation_applied(self):
+        exif = Image.Exif()
+        exif[ORIENTATION] = 6
+        form = clean_image(make_upload((100, 50), exif=exif.tobytes()))
+        image = Image.open(form.cleaned_data['image'])
+        self.assertNotIn('exif', image.info)
+        self.assertEqual(image.size, (50, 100))
+
+    def test_png_keeps_format(self):
+        form = clean_image(
+            make_upload((400, 400), image_format='PNG', name='pic.png')
+        )
+        image = form.cleaned_data['image']
+        self.assertEqual(image.name, 'pic.png')
+        self.assertEqual(Image.open(image).format, 'PNG')
+
+    def test_rotated_png_downscaled_within_bounds(self):
+        """PNG уменьшается до поворота, результат укладывается в размер"""
+        exif = Image.Exif()
+        exif[ORIENTATION] = 6
+        form = clean_image(make_upload(
+            (800, 100), image_format='PNG', exif=exif.tobytes(),
+            name='wide.png',
+        ))
+        image = Image.open(form.cleaned_data['image'])
+        self.assertEqual(image.size, (25, 200))
+        self.assertNotIn('exif', image.info)
+
+    def make_animation(self, size, exif=None):
+        frames = [Image.new('RGB', size, color) for color in ('red', 'blue')]
+        buffer = BytesIO()
+        options = {'exif': exif} if exif is not None else {}
+        frames[0].save(
+            buffer, format='WEBP', save_all=True,
+            append_images=frames[1:], **options,
+        )
+        return SimpleUploadedFile(
+            'anim.webp', buffer.getvalue(), content_type='image/webp'
+        )
+
+    def test_small_animation_with_exif_kept(self):
+        exif = Image.Exif()
+        exif[ORIENTATION] = 1
+        upload = self.make_animation((100, 50), exif=exif.tobytes())
+        form = clean_image(upload)
+        self.assertIs(form.cleaned_data['image'], upload)
+
+    def test_large_animation_rejected(self):
+        form = clean_image(self.make_animation((400, 50)))
+        self.assertFalse(form.is_valid())
+        self.assertEqual(
+            form.errors.as_data()['image'][0].code, 'animated_too_large'
+        )
+
+    def test_decompression_bomb_rejected(self):
+        """Картинка с огромным числом пикселей отклоняется до декодирования"""
+        form = clean_image(
+            make_upload((2000, 1000), image_format='PNG', name='bomb.png')
+        )
+        self.assertFalse(form.is_valid())
+        self.assertIn('image', form.errors)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POSTS_THUMBNAIL_ASYNC=False)
+class ImageMetadataTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='TestAuthor')
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self) -> None:
+        cache.clear()
+        default.kvstore.local.clear()
+
+    def create_post(self):
+        return Post.objects.create(
+            text='Пост',
+            author=self.author,
+            image=make_upload(
+                (120, 80), image_format='PNG', name='pic.png', color='blue'
+            ),
+        )
+
+    def test_metadata_stored_on_upload(self):
+        """Размеры, объём и цвет-заглушка сохраняются вместе с постом"""
+        post = self.create_post()
+        post.refresh_from_db()
+        self.assertEqual((post.image_width, post.image_height), (120, 80))
+        self.assertEqual(post.image_size, post.image.size)
+        self.assertEqual(post.image_placeholder, '#0000ff')
+
+    @override_settings(POSTS_IMAGE_MAX_SIZE=(200, 200))
+    def test_form_upload_reuses_ingestion_metadata(self):
+        """pre_save берёт метаданные из ingest_image, не читая файл снова"""
+        form = PostForm(
+            data={'text': 'Пост'},
+            files={'image': make_upload(
+                (300, 200), image_format='PNG', name='pic.png', color='blue'
+            )},
+        )
+        self.assertTrue(form.is_valid())
+        form.instance.author = self.author
+        with mock.patch('posts.signals.image_metadata') as image_metadata:
+            post = form.save()
+        image_metadata.assert_not_called()
+        post.refresh_from_db()
+        self.assertEqual((post.image_width, post.image_height), (200, 133))
+        self.assertEqual(post.image_size, post.image.size)
+        self.assertEqual(post.image_placeholder, '#0000ff')
+
+    def test_thumbnail_size_from_stored_dimensions(self):
+        post = Post(image_width=1920, image_height=1080)
+        self.assertEqual(thumbnail_size(post, '960x339'), (603, 339))
+        self.assertEqual(
+            thumbnail_size(post, '960x339', crop=True), (960, 339)
+        )
+        small = Post(image_width=120, image_height=80)
+        self.assertEqual(
+            thumbnail_size(small, '960x339', crop=True), (120, 80)
+        )
+        self.assertIsNone(thumbnail_size(Post(), '960x339'))
+
+    def test_backfill_existing_rows(self):
+        post = self.create_post()
+        Post.objects.update(
+            image_width=None, image_height=None, image_size=None,
+            image_placeholder='',
+        )
+        migration = import_module('posts.migrations.0015_post_image_metadata')
+        migration.fill_image_metadata(apps, None)
+        post.refresh_from_db()
+        self.assertEqual((post.image_width, post.image_height), (120, 80))
+        self.assertEqual(post.image_placeholder, '#0000ff')
+
+    def test_decompression_bomb_leaves_metadata_empty(self):
+        """Слишком большая картинка не роняет сохранение и миграцию"""
+        with mock.patch.object(Image, 'MAX_IMAGE_PIXELS', 100):
+            post = self.create_post()
+            migration = import_module(
+                'posts.migrations.0015_post_image_metadata'
+            )
+            migration.fill_image_metadata(apps, None)
+        post.refresh_from_db()
+        self.assertIsNone(post.image_width)
+        self.assertIsNone(post.image_size)
+        self.assertEqual(post.image_placeholder, '')
+
+    def test_feed_image_is_lazy_and_sized(self):
+        self.create_post()
+        response = Client().get(
+            reverse('posts:profile', args=[self.author.username])
+        )
+        self.assertContains(response, 'width="960" height="339"')
+        self.assertContains(response, 'loading="lazy"')
+        self.assertContains(response, 'background-color: #0000ff')
@@ -0,0 +1,142 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from ..models import AuthorStats, Group, ImportCheckpoint, Post, User
+from ..search import SearchResults
+
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class ImportPostsTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.author = User.objects.create_user(username='TestAuthor')
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def write(self, name, content):
+        path = os.path.join(TEMP_DIR, name)
+        with open(path, 'w', encoding='utf-8') as source:
+            source.write(content)
+        return path
+
+    def run_import(self, path, **options):
+        out, err = StringIO(), StringIO()
+        call_command('import_posts', path, stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_csv_import_keeps_counters_and_search(self):
+        path = self.write('posts.csv', (
+            'text,author,group,pub_date\n'
+            'Импортированный жираф,TestAuthor,test-slug,'
+            '2020-01-02T10:00:00+00:00\n'
+            'Второй пост,TestAuthor,,2021-05-06T10:00:00+00:00\n'
+            ',TestAuthor,,\n'
+            'Пост без автора,Nobody,,\n'
+        ))
+        out, err = self.run_import(path, batch_size=1, chunk_size=2)
+        self.assertIn('Импортировано постов: 2, пропущено: 2', out)
+        self.assertIn('Запись 3: пустой текст', err)
+        self.assertIn("Запись 4: нет автора 'Nobody'", err)
+
+        post = Post.objects.get(text='Импортированный жираф')
+        self.assertEqual(post.pub_date.year, 2020)
+        self.assertEqual(
+            Post.objects.get(text='Второй пост').pub_date.year, 2021
+        )
+        self.assertEqual(post.group, self.group)
+        stats = AuthorStats.objects.get(author=self.author)
+        self.assertEqual(stats.posts_count, 2)
+        self.assertEqual(stats.last_post_at.year, 2021)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+        call_command('rebuild_post_counters', verify=True, stdout=StringIO())
+        self.assertEqual(
+            [found.pk for found in SearchResults('жираф')[:10]], [post.pk]
+        )
+
+    def test_posts_written_once(self):
+        """Посты с датами источника вставляются без последующего UPDATE"""
+        path = self.write('once.csv', (
+            'text,author,group,pub_date\n'
+            'Первый,TestAuthor,test-slug,2019-03-04T10:00:00+00:00\n'
+            'Второй,TestAuthor,,2018-07-08T10:00:00+00:00\n'
+        ))
+        with CaptureQueriesContext(connection) as queries:
+            self.run_import(path, batch_size=1)
+        self.assertFalse([
+            query['sql'] for query in queries
+            if query['sql'].startswith('UPDATE "posts_post"')
+        ])
+        self.assertEqual(
+            Post.objects.get(text='Первый').pub_date.year, 2019
+        )
+        self.assertEqual(
+            Post.objects.get(text='Второй').pub_date.year, 2018
+        )
+
+    def test_new_posts_still_dated_now(self):
+        """После импорта обычные посты получают текущее время"""
+        path = self.write('dated.csv', (
+            'text,author,group,pub_date\n'
+            'Старый пост,TestAuthor,,2020-01-02T10:00:00+00:00\n'
+        ))
+        self.run_import(path)
+        before = timezone.now()
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertGreaterEqual(post.pub_date, before)
+
+    def test_jsonl_creates_missing_authors_and_groups(self):
+        path = self.write('posts.jsonl', '\n'.join([
+            json.dumps({'text': 'Пост', 'author': 'new', 'group': 'new-slug'}),
+            '{broken',
+            '',
+        ]))
+        out, err = self.run_import(
+            path, create_authors=True, create_groups=True
+        )
+        self.assertIn('Импортировано постов: 1, пропущено: 1', out)
+        self.assertIn('Запись 2: запись не разобрана', err)
+        post = Post.objects.get(author__username='new')
+        self.assertEqual(post.group.slug, 'new-slug')
+        self.assertFalse(post.author.has_usable_password())
+
+    def test_resume_from_checkpoint(self):
+        """Повторный запуск продолжает с места последнего коммита"""
+        path = self.write('resume.jsonl', '\n'.join(
+            json.dumps({'text': f'Пост {number}', 'author': 'TestAuthor'})
+            for number in range(5)
+        ))
+        ImportCheckpoint.objects.create(name='resume.jsonl', position=3)
+        out, _ = self.run_import(path)
+        self.assertIn('Продолжаем после записи 3', out)
+        self.assertEqual(
+            sorted(Post.objects.values_list('text', flat=True)),
+            ['Пост 3', 'Пост 4'],
+        )
+        self.run_import(path)
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(
+            ImportCheckpoint.objects.get(name='resume.jsonl').position, 5
+        )
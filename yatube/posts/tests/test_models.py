@@ -1,5 +1,9 @@
+from datetime import datetime, timezone
+
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from pytils.translit import translify
 
 from ..models import Group, Post
@@ -42,3 +46,22 @@ class PostModelTest(TestCase):
             translify('Тестовая группа'),
             'Неправильный object_name для модели Group'
         )
+
+    def test_bulk_create_dated_inserts_source_dates(self):
+        """bulk_create_dated пишет pub_date в INSERT, без UPDATE"""
+        dates = [
+            datetime(2020, 1, day, tzinfo=timezone.utc) for day in (1, 2)
+        ]
+        posts = [
+            Post(author=PostModelTest.user, text=f'Пост {day}', pub_date=date)
+            for day, date in enumerate(dates)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            Post.objects.bulk_create_dated(posts, batch_size=1)
+        statements = [query['sql'].split()[0] for query in queries]
+        self.assertEqual(statements.count('INSERT'), 2)
+        self.assertNotIn('UPDATE', statements)
+        for day, date in enumerate(dates):
+            post = Post.objects.get(text=f'Пост {day}')
+            self.assertEqual(post.pub_date, date)
+            self.assertEqual(post.updated_at, date)
@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.profiling import ProfilerMiddleware
+
+from ..models import Post, User
+
+
+TEMP_PROFILER_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SLOW_VIEW_SECONDS = 0.05
+
+
+@override_settings(PROFILER_DIR=TEMP_PROFILER_DIR)
+class ProfilerTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.staff = User.objects.create_user(
+            username='Staff', is_staff=True
+        )
+        for number in range(20):
+            Post.objects.create(text=f'Пост {number}', author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(TEMP_PROFILER_DIR, ignore_errors=True)
+
+    def setUp(self) -> None:
+        cache.clear()
+        shutil.rmtree(TEMP_PROFILER_DIR, ignore_errors=True)
+
+    def profiles(self):
+        if not os.path.isdir(TEMP_PROFILER_DIR):
+            return []
+        return os.listdir(TEMP_PROFILER_DIR)
+
+    def test_staff_request_is_profiled(self):
+        client = Client()
+        client.force_login(self.staff)
+        # Представление работает дольше нескольких интервалов сэмплирования
+        with mock.patch(
+            'posts.views.prefetch_thumbnails',
+            side_effect=lambda page: time.sleep(SLOW_VIEW_SECONDS),
+        ):
+            response = client.get(reverse('posts:index'), {'__profile': 1})
+        self.assertEqual(response.status_code, 200)
+        name = response['X-Profile']
+        self.assertEqual(self.profiles(), [name])
+        self.assertIn('posts-index', name)
+        with open(os.path.join(TEMP_PROFILER_DIR, name)) as profile:
+            lines = profile.read().splitlines()
+        self.assertTrue(lines)
+        for line in lines:
+            self.assertRegex(line, r'^\S.* \d+$')
+        self.assertTrue(any('(posts/views.py:' in line for line in lines))
+
+    def test_header_trigger_and_rate_limit(self):
+        client = Client()
+        client.force_login(self.staff)
+        url = reverse('posts:post_create')
+        first = client.get(url, HTTP_X_PROFILE='1')
+        second = client.get(url, HTTP_X_PROFILE='1')
+        self.assertTrue(first['X-Profile'].endswith('.collapsed'))
+        self.assertEqual(second['X-Profile'], 'rate-limited')
+        self.assertEqual(len(self.profiles()), 1)
+
+    def test_not_available_to_others(self):
+        client = Client()
+        client.force_login(self.author)
+        for response in (
+            client.get(reverse('posts:index'), {'__profile': 1}),
+            Client().get(reverse('posts:index'), HTTP_X_PROFILE='1'),
+        ):
+            self.assertNotIn('X-Profile', response)
+        self.assertEqual(self.profiles(), [])
+
+    @override_settings(PROFILER_DIR=None)
+    def test_disabled_middleware_is_removed(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            ProfilerMiddleware(lambda request: None)
@@ -0,0 +1,114 @@
+from django.db import connection
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post, User
+
+
+POSTS_ON_PAGE = 10
+
+
+class QueryBudgetMixin:
+    """Проверка, что страница укладывается в заявленное число запросов"""
+
+    def assertQueryBudget(self, client, url, budget):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        executed = len(queries)
+        self.assertLessEqual(
+            executed,
+            budget,
+            f'{url}: {executed} запросов при бюджете {budget}\n'
+            + '\n'.join(query['sql'] for query in queries.captured_queries)
+        )
+
+
+class PostQueryBudgetTest(QueryBudgetMixin, TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.authors = [
+            User.objects.create_user(
+                username=f'author{number}',
+                first_name='Имя',
+                last_name=f'Фамилия {number}',
+            )
+            for number in range(POSTS_ON_PAGE)
+        ]
+        cls.posts = [
+            Post.objects.create(
+                text='Тестовый пост',
+                author=author,
+                group=cls.group,
+            )
+            for author in cls.authors
+        ]
+        cls.post = cls.posts[0]
+        cls.author = cls.post.author
+
+        # Бюджеты запросов: адрес -> (гость, авторизованный автор).
+        # Авторизованный клиент тратит ещё два запроса: сессия и пользователь
+        cls.BUDGETS: dict = {
+            reverse('posts:index'): (2, 4),
+            reverse('posts:group_index'): (2, 4),
+            reverse(
+                'posts:groups', kwargs={'slug': cls.group.slug}
+            ): (2, 4),
+            reverse(
+                'posts:profile', kwargs={'username': cls.author.username}
+            ): (2, 4),
+            reverse(
+                'posts:post_detail', kwargs={'post_id': cls.post.pk}
+            ): (1, 3),
+        }
+        cls.PRIVATE_BUDGETS: dict = {
+            reverse(
+                'posts:post_edit', kwargs={'post_id': cls.post.pk}
+            ): 4,
+        }
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(PostQueryBudgetTest.author)
+
+    def test_guest_pages_within_budget(self):
+        """Публичные страницы для гостя не превышают бюджет запросов"""
+        for url, (budget, _) in PostQueryBudgetTest.BUDGETS.items():
+            with self.subTest(url=url):
+                self.assertQueryBudget(self.guest_client, url, budget)
+
+    def test_authorized_pages_within_budget(self):
+        """Страницы для автора не превышают бюджет запросов"""
+        budgets = {
+            url: budget
+            for url, (_, budget) in PostQueryBudgetTest.BUDGETS.items()
+        }
+        budgets.update(PostQueryBudgetTest.PRIVATE_BUDGETS)
+        for url, budget in budgets.items():
+            with self.subTest(url=url):
+                self.assertQueryBudget(self.authorized_client, url, budget)
+
+    def test_feed_budget_does_not_grow_with_posts(self):
+        """Число запросов ленты не зависит от числа авторов на странице"""
+        url = reverse('posts:index')
+        with CaptureQueriesContext(connection) as first:
+            self.guest_client.get(url)
+        Post.objects.create(
+            text='Ещё один пост',
+            author=User.objects.create_user(username='another'),
+        )
+        with CaptureQueriesContext(connection) as second:
+            self.guest_client.get(url)
+        self.assertEqual(len(first), len(second))
@@ -0,0 +1,126 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Group, Post, User
+from ..routers import PRIMARY_COOKIE
+
+
+REPLICA = 'replica'
+
+
+@override_settings(POSTS_READ_REPLICAS=[REPLICA])
+class ReplicaRoutingTest(TestCase):
+    # Реплику заменяет второй файл SQLite: данные в него пишутся напрямую,
+    # поэтому по содержимому ответа видно, из какой базы шло чтение
+    databases = {'default', REPLICA}
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.temp_dir = tempfile.mkdtemp()
+        path = os.path.join(cls.temp_dir, 'replica.sqlite3')
+        connections.databases[REPLICA] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': path,
+            'TEST': {'NAME': path},
+        }
+        call_command('migrate', database=REPLICA, verbosity=0)
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.author.save(using=REPLICA)
+        cls.group.save(using=REPLICA)
+        Post.objects.create(text='Пост в основной базе', author=cls.author)
+        # bulk_create не вызывает сигналы, которые писали бы в default
+        Post.objects.using(REPLICA).bulk_create([
+            Post(text='Пост на реплике', author=cls.author, group=cls.group)
+        ])
+        Group.objects.using(REPLICA).update(posts_count=1)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.databases[REPLICA]
+        shutil.rmtree(cls.temp_dir, ignore_errors=True)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = Client()
+
+    def test_feeds_and_api_read_from_replica(self):
+        self.client.force_login(self.author)
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:groups', args=[self.group.slug]),
+            reverse('posts:api_posts'),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, 'Пост на реплике')
+                self.assertNotContains(response, 'Пост в основной базе')
+                self.assertNotIn(PRIMARY_COOKIE, response.cookies)
+
+    def test_replica_pages_have_no_validators(self):
+        """Данные реплики могут быть старше поколений в ETag"""
+        self.client.force_login(self.author)
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('ETag'))
+        self.assertFalse(response.has_header('Last-Modified'))
+
+    def test_cached_pages_read_from_primary(self):
+        """Страница для общего кэша не берётся с отстающей реплики"""
+        url = reverse('posts:index')
+        response = self.client.get(url)
+        self.assertContains(response, 'Пост в основной базе')
+        self.assertNotContains(response, 'Пост на реплике')
+        self.assertTrue(response.has_header('ETag'))
+        self.assertContains(
+            self.client.get(reverse('posts:api_posts')), 'Пост на реплике'
+        )
+
+    def test_other_views_use_primary(self):
+        response = self.client.get(reverse('posts:search'), {'q': 'Пост'})
+        # Совпадение в тексте выделяется разметкой
+        self.assertContains(response, 'в основной базе')
+        self.assertNotContains(response, 'на реплике')
+
+    def test_reads_after_write_use_primary(self):
+        self.client.force_login(self.author)
+        response = self.client.post(
+            reverse('posts:post_create'), {'text': 'Только что написан'}
+        )
+        self.assertEqual(
+            response.cookies[PRIMARY_COOKIE]['max-age'],
+            settings.POSTS_REPLICA_LAG,
+        )
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Только что написан')
+        self.assertContains(response, 'Пост в основной базе')
+
+        del self.client.cookies[PRIMARY_COOKIE]
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Пост на реплике')
+        self.assertNotContains(response, 'Только что написан')
+
+    @override_settings(POSTS_READ_REPLICAS=[])
+    def test_without_replicas_everything_uses_primary(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Пост в основной базе')
+        self.client.force_login(self.author)
+        response = self.client.post(
+            reverse('posts:post_create'), {'text': 'Новый пост'}
+        )
+        self.assertNotIn(PRIMARY_COOKIE, response.cookies)
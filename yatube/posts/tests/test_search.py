@@ -0,0 +1,91 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post, User
+from ..search import FTS_TABLE
+
+
+SEARCH = reverse('posts:search')
+
+
+class PostSearchTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_superuser(
+            username='TestAuthor', email='author@example.com', password='pass'
+        )
+        cls.post = Post.objects.create(
+            text='Кошка <b>спит</b> на тёплом окне',
+            author=cls.author,
+        )
+        Post.objects.create(text='Собака гуляет во дворе', author=cls.author)
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.guest_client = Client()
+
+    def found(self, query):
+        response = self.guest_client.get(SEARCH, {'q': query})
+        return [post.pk for post in response.context['page_obj']]
+
+    def test_search_finds_and_highlights(self):
+        """Поиск находит пост и подсвечивает слово, экранируя HTML"""
+        response = self.guest_client.get(SEARCH, {'q': 'кошка'})
+        self.assertEqual(
+            [post.pk for post in response.context['page_obj']],
+            [self.post.pk]
+        )
+        self.assertContains(response, '<mark>Кошка</mark>')
+        self.assertContains(response, '&lt;b&gt;спит&lt;/b&gt;')
+
+    def test_index_follows_edit_and_delete(self):
+        """Триггеры поддерживают индекс при изменении и удалении поста"""
+        post = Post.objects.create(text='Попугай поёт', author=self.author)
+        self.assertEqual(self.found('попугай'), [post.pk])
+        post.text = 'Канарейка поёт'
+        post.save()
+        self.assertEqual(self.found('попугай'), [])
+        self.assertEqual(self.found('канарейка'), [post.pk])
+        post.delete()
+        self.assertEqual(self.found('канарейка'), [])
+
+    def test_query_operators_are_ignored(self):
+        """Синтаксис FTS5 в запросе не ломает поиск"""
+        self.assertEqual(self.found('"кошка*'), [self.post.pk])
+        self.assertEqual(self.found('кошка NEAR('), [])
+        self.assertEqual(self.found('!!!'), [])
+
+    def test_pagination_keeps_query(self):
+        for number in range(12):
+            Post.objects.create(
+                text=f'Слон номер {number}', author=self.author
+            )
+        response = self.guest_client.get(SEARCH, {'q': 'слон'})
+        self.assertEqual(response.context['page_obj'].paginator.count, 12)
+        self.assertContains(response, '?q=%D1%81%D0%BB%D0%BE%D0%BD&amp;page=2')
+        response = self.guest_client.get(SEARCH, {'q': 'слон', 'page': 2})
+        self.assertEqual(len(response.context['page_obj']), 2)
+
+    def test_admin_search_uses_index(self):
+        client = Client()
+        client.force_login(self.author)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'собака'}
+        )
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('delete-all')"
+            )
+        self.assertEqual(self.found('кошка'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.found('кошка'), [self.post.pk])
@@ -0,0 +1,81 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+from ..models import AuthorStats, Group, Post, StoredImage, User
+
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class SeedTest(TestCase):
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def seed(self, **options):
+        out = StringIO()
+        call_command(
+            'seed', users=20, groups=5, posts=300, batch_size=100,
+            stdout=out, **options
+        )
+        return out.getvalue()
+
+    def snapshot(self):
+        return list(Post.objects.order_by('pk').values_list(
+            'text', 'author__username', 'group__slug', 'pub_date', 'image'
+        ))
+
+    def test_counts_and_counters(self):
+        out = self.seed(images=0.5)
+        self.assertIn('Создано пользователей: 20, групп: 5, постов: 300', out)
+        self.assertEqual(Post.objects.count(), 300)
+        for stats in AuthorStats.objects.all():
+            self.assertEqual(
+                stats.posts_count,
+                Post.objects.filter(author_id=stats.author_id).count(),
+            )
+        for group in Group.objects.all():
+            self.assertEqual(group.posts_count, group.posts.count())
+        with_image = Post.objects.exclude(image='')
+        self.assertTrue(0 < with_image.count() < 300)
+        self.assertIsNotNone(with_image.first().image_width)
+        for stored in StoredImage.objects.all():
+            self.assertEqual(
+                stored.references,
+                Post.objects.filter(image=stored.name).count(),
+            )
+        # pub_date из команды, а не время вставки
+        self.assertEqual(
+            Post.objects.latest('pub_date').pub_date.year, 2024
+        )
+        self.assertEqual(
+            Post.objects.earliest('pub_date').pub_date.year, 2023
+        )
+
+    def test_distribution_is_skewed(self):
+        self.seed(skew=1.5)
+        counts = list(
+            AuthorStats.objects.order_by('-posts_count')
+            .values_list('posts_count', flat=True)
+        )
+        self.assertGreater(counts[0], 300 // 20 * 3)
+        self.assertGreater(counts[0], counts[-1] * 5)
+
+    def test_same_seed_gives_same_data(self):
+        self.seed(seed=7)
+        first = self.snapshot()
+        with self.assertRaises(CommandError):
+            self.seed(seed=7)
+        Post.objects.all().delete()
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        self.seed(seed=7)
+        self.assertEqual(self.snapshot(), first)
@@ -0,0 +1,60 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.test import SimpleTestCase, override_settings
+
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class SqlitePragmasTest(SimpleTestCase):
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def connect(self, name):
+        # Отдельное соединение с файлом: тестовая база в памяти не
+        # поддерживает WAL
+        default = connections['default']
+        settings_dict = dict(
+            default.settings_dict, NAME=os.path.join(TEMP_DIR, name)
+        )
+        wrapper = default.__class__(settings_dict, alias='pragmas')
+        self.addCleanup(wrapper.close)
+        wrapper.ensure_connection()
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_new_connection_is_tuned(self):
+        wrapper = self.connect('tuned.sqlite3')
+        pragmas = settings.SQLITE_PRAGMAS
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+        self.assertEqual(
+            self.pragma(wrapper, 'busy_timeout'), pragmas['busy_timeout']
+        )
+        self.assertEqual(
+            self.pragma(wrapper, 'cache_size'), pragmas['cache_size']
+        )
+        # NORMAL = 1, MEMORY = 2
+        self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)
+        self.assertEqual(self.pragma(wrapper, 'temp_store'), 2)
+
+    @override_settings(SQLITE_PRAGMAS={})
+    def test_no_pragmas_keeps_defaults(self):
+        wrapper = self.connect('stock.sqlite3')
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'delete')
+
+    @override_settings(SQLITE_PRAGMAS={'writable_schema': 1})
+    def test_unknown_pragma_is_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.connect('unknown.sqlite3')
@@ -0,0 +1,136 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TransactionTestCase, override_settings
+from PIL import Image
+from sorl.thumbnail import default
+
+from ..models import Post, StoredImage, User
+from ..thumbnails import generate_thumbnails
+
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+OTHER_GIF = SMALL_GIF.replace(b'\xFF\xFF\xFF', b'\x00\xFF\x00')
+
+
+def upload(name, content=SMALL_GIF):
+    return SimpleUploadedFile(name, content, content_type='image/gif')
+
+
+def media_path(name):
+    return os.path.join(TEMP_MEDIA_ROOT, name)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POSTS_THUMBNAIL_ASYNC=False)
+class ContentAddressedStorageTest(TransactionTestCase):
+
+    def setUp(self) -> None:
+        cache.clear()
+        default.kvstore.local.clear()
+        self.author = User.objects.create_user(username='TestAuthor')
+
+    def tearDown(self) -> None:
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post(self, image):
+        return Post.objects.create(text='Пост', author=self.author,
+                                   image=image)
+
+    def test_identical_uploads_share_file(self):
+        """Одинаковые байты сохраняются один раз под именем по хешу"""
+        first = self.create_post(upload('first.GIF'))
+        second = self.create_post(upload('second.gif'))
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(
+            first.image.name,
+            r'^posts/([0-9a-f]{2})/([0-9a-f]{2})/\1\2[0-9a-f]{60}\.gif$'
+        )
+        directory = os.path.dirname(media_path(first.image.name))
+        self.assertEqual(len(os.listdir(directory)), 1)
+
+    def test_file_deleted_with_last_reference(self):
+        first = self.create_post(upload('first.gif'))
+        second = self.create_post(upload('second.gif'))
+        generate_thumbnails(first.image.name)
+        path = media_path(first.image.name)
+        thumbnails = [
+            os.path.join(root, name)
+            for root, _, files in os.walk(media_path('cache'))
+            for name in files
+        ]
+        self.assertEqual(len(thumbnails), 1)
+
+        first.delete()
+        self.assertTrue(os.path.exists(path))
+        second.delete()
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(os.path.exists(thumbnails[0]))
+
+    def test_replaced_image_released(self):
+        post = self.create_post(upload('first.gif'))
+        old_path = media_path(post.image.name)
+        post = Post.objects.get(pk=post.pk)
+        post.image = upload('other.gif', OTHER_GIF)
+        post.save()
+        self.assertFalse(os.path.exists(old_path))
+        self.assertTrue(os.path.exists(media_path(post.image.name)))
+        self.assertNotIn('other', post.image.name)
+
+    def test_upload_during_release_keeps_file(self):
+        """Файл, на который уже сослалась новая загрузка, не удаляется"""
+        post = self.create_post(upload('first.gif'))
+        storage = Post._meta.get_field('image').storage
+        # Загрузка тех же байт сохранена, а её пост ещё не записан
+        name = storage.save('posts/second.gif', upload('second.gif'))
+        self.assertEqual(name, post.image.name)
+        post.delete()
+        self.assertTrue(os.path.exists(media_path(name)))
+        other = self.create_post(name)
+        other.delete()
+        self.assertFalse(os.path.exists(media_path(name)))
+
+    def test_same_bytes_uploaded_again(self):
+        post = self.create_post(upload('first.gif'))
+        post = Post.objects.get(pk=post.pk)
+        post.image = upload('again.gif')
+        post.save()
+        self.assertEqual(
+            StoredImage.objects.get(name=post.image.name).references, 1
+        )
+        post.delete()
+        self.assertFalse(os.path.exists(media_path(post.image.name)))
+        self.assertFalse(StoredImage.objects.exists())
+
+    def test_image_added_to_existing_post(self):
+        post = self.create_post('')
+        post = Post.objects.get(pk=post.pk)
+        post.image = upload('first.gif')
+        post.save()
+        self.assertEqual(
+            StoredImage.objects.get(name=post.image.name).references, 1
+        )
+
+    def test_extension_follows_image_format(self):
+        buffer = BytesIO()
+        Image.new('RGB', (2, 2), 'red').save(buffer, 'JPEG')
+        names = {
+            self.create_post(SimpleUploadedFile(
+                name, buffer.getvalue(), content_type='image/jpeg'
+            )).image.name
+            for name in ('photo.JPG', 'photo.jpeg', 'photo.png')
+        }
+        self.assertEqual(len(names), 1)
+        self.assertTrue(names.pop().endswith('.jpg'))
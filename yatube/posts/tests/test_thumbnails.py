@@ -0,0 +1,146 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, TransactionTestCase
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+from sorl.thumbnail import default
+
+from ..kvstore import LRUCache
+from ..models import Post, User
+
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+def make_gif(name, color):
+    """Маленькая GIF-картинка: разные цвета дают разные файлы."""
+    buffer = BytesIO()
+    Image.new('RGB', (2, 1), color).save(buffer, format='GIF')
+    return SimpleUploadedFile(
+        name, buffer.getvalue(), content_type='image/gif'
+    )
+
+
+def thumbnail_files():
+    """Файлы миниатюр, созданные sorl-thumbnail в MEDIA_ROOT."""
+    found = []
+    for root, _, files in os.walk(os.path.join(TEMP_MEDIA_ROOT, 'cache')):
+        found.extend(files)
+    return found
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POSTS_THUMBNAIL_ASYNC=False)
+class ThumbnailOnUploadTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='TestAuthor')
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self) -> None:
+        default.kvstore.local.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ThumbnailOnUploadTest.author)
+
+    def test_create_with_image_generates_thumbnails(self):
+        """Миниатюры создаются при сохранении поста, а не при рендере"""
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={
+                'text': 'Пост с картинкой',
+                'image': SimpleUploadedFile(
+                    'small.gif', SMALL_GIF, content_type='image/gif'
+                ),
+            },
+        )
+        self.assertTrue(Post.objects.filter(image__startswith='posts/'))
+        self.assertEqual(
+            len(thumbnail_files()), len(settings.POSTS_THUMBNAIL_GEOMETRIES)
+        )
+
+    def kvstore_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get(url)
+        return [
+            query['sql'] for query in queries.captured_queries
+            if 'thumbnail_kvstore' in query['sql']
+        ]
+
+    def test_feed_resolves_thumbnails_in_one_query(self):
+        """Миниатюры страницы ленты берутся из хранилища одним запросом"""
+        for number in range(3):
+            self.authorized_client.post(
+                reverse('posts:post_create'),
+                data={
+                    'text': f'Пост {number}',
+                    'image': make_gif(f'feed{number}.gif', number),
+                },
+            )
+        url = reverse('posts:profile', args=[self.author.username])
+        cache.clear()
+        default.kvstore.local.clear()
+        self.assertEqual(len(self.kvstore_queries(url)), 1)
+        # Общий кэш очищен, но метаданные остались в LRU процесса
+        cache.clear()
+        self.assertEqual(self.kvstore_queries(url), [])
+
+
+class LRUCacheTest(TestCase):
+
+    def test_evicts_least_recently_used(self):
+        lru = LRUCache(2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertEqual(lru.get('a'), 1)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(len(lru), 2)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class GenerateThumbnailsCommandTest(TransactionTestCase):
+
+    def setUp(self) -> None:
+        # Файлы миниатюр удаляются между тестами, а LRU живёт в процессе
+        cache.clear()
+        default.kvstore.local.clear()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_backfill_existing_images(self):
+        author = User.objects.create_user(username='TestAuthor')
+        for number in range(3):
+            Post.objects.create(
+                text=f'Пост {number}',
+                author=author,
+                image=make_gif(f'small{number}.gif', number),
+            )
+        out = StringIO()
+        call_command('generate_thumbnails', workers=2, stdout=out)
+        self.assertIn('Обработано картинок: 3, ошибок: 0', out.getvalue())
+        self.assertEqual(len(thumbnail_files()), 3)
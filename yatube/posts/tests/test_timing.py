@@ -0,0 +1,107 @@
+import json
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import cache
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils.functional import SimpleLazyObject
+from sorl.thumbnail import default
+
+from core.sessions import SessionStore
+from core.timing import user_id
+
+from ..models import Post, User
+from .test_thumbnails import make_gif
+
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def timing_metrics(response):
+    """Имена метрик заголовка Server-Timing."""
+    return {
+        metric.split(';', 1)[0].strip()
+        for metric in response['Server-Timing'].split(',')
+    }
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POSTS_THUMBNAIL_ASYNC=False)
+class ServerTimingTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.staff = User.objects.create_user(
+            username='Staff', is_staff=True
+        )
+        cls.post = Post.objects.create(
+            text='Пост с картинкой',
+            author=cls.author,
+            image=make_gif('timing.gif', (10, 20, 30)),
+        )
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self) -> None:
+        cache.clear()
+        default.kvstore.local.clear()
+
+    def test_staff_receive_server_timing(self):
+        client = Client()
+        client.force_login(self.staff)
+        response = client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertEqual(
+            timing_metrics(response),
+            {'sql', 'template', 'thumbnail', 'session', 'total'},
+        )
+        self.assertRegex(
+            response['Server-Timing'], r'sql;dur=[\d.]+;desc="\d+"'
+        )
+
+    def test_other_users_do_not(self):
+        client = Client()
+        client.force_login(self.author)
+        for response in (
+            client.get(reverse('posts:index')),
+            Client().get(reverse('posts:index')),
+        ):
+            self.assertNotIn('Server-Timing', response)
+
+    def test_access_log_line(self):
+        client = Client()
+        client.force_login(self.author)
+        with self.assertLogs('core.access', 'INFO') as logs:
+            client.get(reverse('posts:profile', args=['TestAuthor']))
+            Client().get('/missing-page/')
+        profile, missing = [
+            json.loads(record.getMessage()) for record in logs.records
+        ]
+        self.assertEqual(profile['view'], 'posts:profile')
+        self.assertEqual(profile['status'], 200)
+        self.assertEqual(profile['user'], self.author.pk)
+        self.assertGreater(profile['queries'], 0)
+        self.assertGreater(profile['template_ms'], 0)
+        self.assertGreaterEqual(profile['duration_ms'], profile['sql_ms'])
+        self.assertIsNone(missing['view'])
+        self.assertIsNone(missing['user'])
+
+    def test_log_does_not_load_user(self):
+        """Для журнала пользователь не загружается, если его не загрузили"""
+        request = RequestFactory().get('/')
+        load_user = mock.Mock(return_value=self.author)
+        request.user = SimpleLazyObject(load_user)
+        request.session = SessionStore()
+        self.assertIsNone(user_id(request))
+        request.session[SESSION_KEY] = str(self.author.pk)
+        self.assertEqual(user_id(request), self.author.pk)
+        load_user.assert_not_called()
@@ -1,9 +1,15 @@
 from django import forms
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.template.loader import render_to_string
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase
 from django.urls import reverse
 
 
 from ..models import Post, Group, User
+from ..paginators import (ELLIPSIS, FORWARD, CursorPaginator,
+                          elided_page_range, encode_cursor)
+from ..views import CURSOR_FROM_PAGE, paginate
 
 
 INDEX = reverse('posts:index')
@@ -41,6 +47,7 @@ class PostsPagesTests(TestCase):
         )
 
     def setUp(self) -> None:
+        cache.clear()
         self.guest = Client()
         self.author = Client()
         self.author.force_login(PostsPagesTests.user)
@@ -157,6 +164,7 @@ class PostsPaginatorTests(TestCase):
             )
 
     def setUp(self) -> None:
+        cache.clear()
         self.guest = Client()
 
     def test_first_page_contains_ten_records(self):
@@ -180,3 +188,130 @@ class PostsPaginatorTests(TestCase):
                 self.assertEqual(
                     len(response.context['page_obj']), POSTS_SECOND_PAGE
                 )
+
+
+class PostsCursorPaginatorTests(TestCase):
+
+    """Тестируем курсорную пагинацию"""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+
+        cls.group = Group.objects.create(
+            title=GROUP_NAME,
+            slug=SLUG,
+            description=GROUP_DESCRIPTION
+        )
+
+        cls.user = User.objects.create(username=USERNAME)
+
+        for _ in range(14):
+            Post.objects.create(
+                text=POST_TEXT,
+                author=cls.user,
+                group=cls.group
+            )
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.guest = Client()
+
+    def test_cursor_pages_cover_all_posts(self):
+        """По курсорам можно пройти ленту вперёд и назад"""
+        for name in [INDEX, GROUP, PROFILE]:
+            with self.subTest(reverse_name=name):
+                first = self.guest.get(name + '?cursor=').context['page_obj']
+                self.assertEqual(len(first), POSTS_FIRST_PAGE)
+                self.assertFalse(first.has_previous())
+                self.assertTrue(first.has_next())
+
+                second = self.guest.get(
+                    name + '?cursor=' + first.next_cursor
+                ).context['page_obj']
+                self.assertEqual(len(second), POSTS_SECOND_PAGE)
+                self.assertFalse(second.has_next())
+                ids = [post.pk for post in first] + [
+                    post.pk for post in second
+                ]
+                self.assertEqual(
+                    ids,
+                    list(Post.objects.order_by(
+                        '-pub_date', '-id'
+                    ).values_list('pk', flat=True))
+                )
+
+                previous = self.guest.get(
+                    name + '?cursor=' + second.previous_cursor
+                ).context['page_obj']
+                self.assertEqual(
+                    [post.pk for post in previous],
+                    [post.pk for post in first]
+                )
+                self.assertFalse(previous.has_previous())
+
+    def test_invalid_cursor_shows_first_page(self):
+        post = Post.objects.latest('pub_date')
+        cursors = [
+            'не-курсор',
+            encode_cursor(FORWARD, post.pub_date, 10 ** 30),
+            encode_cursor(FORWARD, post.pub_date, 0),
+            encode_cursor(FORWARD, post.pub_date.replace(tzinfo=None), 1),
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                response = self.guest.get(INDEX, {'cursor': cursor})
+                page_obj = response.context['page_obj']
+                self.assertEqual(len(page_obj), POSTS_FIRST_PAGE)
+                self.assertFalse(page_obj.has_previous())
+
+    def test_deep_numbered_page_links_to_cursor(self):
+        """С глубоких нумерованных страниц дальше ведёт курсор"""
+        post_list = Post.objects.feed()
+        pages = [
+            paginate(RequestFactory().get(INDEX, {'page': number}),
+                     post_list, post_number=3)
+            for number in (CURSOR_FROM_PAGE - 1, CURSOR_FROM_PAGE)
+        ]
+        self.assertIsNone(pages[0].next_cursor)
+        following = CursorPaginator(post_list, 3).page(pages[1].next_cursor)
+        self.assertEqual(
+            [post.pk for post in following],
+            [post.pk for post in pages[1].paginator.page(
+                CURSOR_FROM_PAGE + 1
+            )],
+        )
+
+
+class ElidedPageRangeTests(SimpleTestCase):
+
+    """Тестируем сокращённый список номеров страниц"""
+
+    def page_range(self, number, count=1000):
+        page = Paginator(range(count), 10).page(number)
+        return list(elided_page_range(page))
+
+    def test_window_around_current_page(self):
+        self.assertEqual(
+            self.page_range(50),
+            [1, ELLIPSIS, 48, 49, 50, 51, 52, ELLIPSIS, 100]
+        )
+
+    def test_no_ellipsis_near_the_ends(self):
+        self.assertEqual(self.page_range(1), [1, 2, 3, ELLIPSIS, 100])
+        self.assertEqual(self.page_range(100), [1, ELLIPSIS, 98, 99, 100])
+        self.assertEqual(self.page_range(3, count=50), [1, 2, 3, 4, 5])
+
+    def test_range_length_is_bounded(self):
+        self.assertLessEqual(len(self.page_range(5000, count=10 ** 6)), 9)
+
+    def test_ellipsis_is_not_a_link(self):
+        page = Paginator(range(1000), 10).page(50)
+        page.elided_page_range = list(elided_page_range(page))
+        html = render_to_string(
+            'posts/includes/paginator.html',
+            {'page_obj': page},
+            request=RequestFactory().get(INDEX),
+        )
+        self.assertEqual(html.count(f'<span class="page-link">{ELLIPSIS}'), 2)
+        self.assertNotIn(f'>{ELLIPSIS}</a>', html)
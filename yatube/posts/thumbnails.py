@@ -0,0 +1,127 @@
+"""Заблаговременная генерация миниатюр картинок постов.
+
+Миниатюры всех геометрий из POSTS_THUMBNAIL_GEOMETRIES создаются после
+сохранения поста в ограниченном пуле потоков, а не при первом рендере
+страницы. Если очередь пула заполнена, задача пропускается: миниатюра
+будет создана лениво тегом {% thumbnail %}, как и раньше.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.base import ThumbnailBackend as BaseThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from core.timing import phase
+
+from .models import Post
+
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+
+def generate_thumbnails(name):
+    """Создаёт миниатюры всех настроенных геометрий для картинки name."""
+    # Ключи sorl зависят от хранилища: берём то же, что у Post.image
+    source = ImageFile(name, Post._meta.get_field('image').storage)
+    for geometry, options in settings.POSTS_THUMBNAIL_GEOMETRIES:
+        get_thumbnail(source, geometry, **options)
+
+
+def thumbnail_file(file_, geometry, options):
+    """ImageFile миниатюры, которую вернёт get_thumbnail для этих опций.
+
+    Повторяет вычисление имени из ThumbnailBackend.get_thumbnail, не
+    обращаясь ни к хранилищу ключей, ни к файлам.
+    """
+    backend = default.backend
+    source = ImageFile(file_)
+    options = dict(options)
+    if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(thumbnail_settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+    name = backend._get_thumbnail_filename(source, geometry, options)
+    return ImageFile(name, default.storage)
+
+
+def prefetch_thumbnails(posts):
+    """Загружает метаданные миниатюр постов одним обращением к хранилищу.
+
+    Работает, если THUMBNAIL_KVSTORE умеет get_many (posts.kvstore):
+    после этого теги {% thumbnail %} в карточках не ходят в БД.
+    """
+    get_many = getattr(default.kvstore, 'get_many', None)
+    if get_many is None:
+        return
+    with phase('thumbnail'):
+        files = [
+            thumbnail_file(post.image, geometry, options)
+            for post in posts
+            if post.image
+            for geometry, options in settings.POSTS_THUMBNAIL_GEOMETRIES
+        ]
+        if files:
+            get_many(files)
+
+
+class ThumbnailBackend(BaseThumbnailBackend):
+    """Бэкенд sorl-thumbnail, отмечающий работу фазой thumbnail."""
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        with phase('thumbnail'):
+            return super().get_thumbnail(file_, geometry_string, **options)
+
+
+def _get_executor():
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.POSTS_THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails',
+            )
+            _slots = threading.BoundedSemaphore(
+                settings.POSTS_THUMBNAIL_QUEUE_SIZE
+            )
+    return _executor, _slots
+
+
+def _run(name, slots):
+    try:
+        generate_thumbnails(name)
+    except Exception:
+        logger.exception('Не удалось создать миниатюры для %s', name)
+    finally:
+        slots.release()
+        # Поток пула живёт долго: соединение с БД закрываем сами
+        connection.close()
+
+
+def _submit(name):
+    executor, slots = _get_executor()
+    if not slots.acquire(blocking=False):
+        logger.warning('Очередь миниатюр заполнена, пропускаем %s', name)
+        return
+    executor.submit(_run, name, slots)
+
+
+def schedule_thumbnails(name):
+    """Ставит генерацию миниатюр в очередь после коммита транзакции."""
+    if not settings.POSTS_THUMBNAIL_ASYNC:
+        generate_thumbnails(name)
+        return
+    transaction.on_commit(lambda: _submit(name))
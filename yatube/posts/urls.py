@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, export, feeds, views
 
 
 app_name = 'posts'
@@ -7,9 +7,34 @@ app_name = 'posts'
 urlpatterns = [
     # Главная страница
     path('', views.index, name='index'),
+    path('group/', views.group_index, name='group_index'),
     path('group/<slug:slug>/', views.group_posts, name='groups'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
+    path('search/', views.search, name='search'),
+    # Atom-ленты
+    path('feeds/atom/', feeds.index_feed, name='index_feed'),
+    path('group/<slug:slug>/atom/', feeds.group_feed, name='group_feed'),
+    path(
+        'profile/<str:username>/atom/',
+        feeds.author_feed,
+        name='author_feed',
+    ),
+    # JSON API только для чтения
+    path('api/posts/', api.post_list, name='api_posts'),
+    path('api/posts/<int:post_id>/', api.post_detail, name='api_post'),
+    path(
+        'api/group/<slug:slug>/posts/',
+        api.group_post_list,
+        name='api_group_posts',
+    ),
+    path(
+        'api/profile/<str:username>/posts/',
+        api.author_post_list,
+        name='api_author_posts',
+    ),
+    # Потоковая выгрузка для персонала
+    path('export/<str:name>/', export.export, name='export'),
 ]
@@ -2,38 +2,81 @@ from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
 from django.shortcuts import get_object_or_404, redirect, render
 
+from .caching import (GLOBAL_SCOPE, author_scope, cache_anonymous_page,
+                      depends_on, group_scope, post_scope,
+                      prefetch_card_versions, username_scope)
+from .conditional import PageState, conditional_page, page_state
 from .forms import PostForm
-from .models import Group, Post, User
+from .models import AuthorStats, Group, Post, User
+from .paginators import CursorPaginator, elided_page_range, next_page_cursor
+from .routers import read_from_replica
+from .search import SearchResults, is_supported as search_is_supported
+from .thumbnails import prefetch_thumbnails, schedule_thumbnails
 
 
 MAX_POST_ON_LIST = 10
+# С этой страницы ссылка «Следующая» ведёт по курсору, а не по номеру
+CURSOR_FROM_PAGE = 3
 
 
 def paginate(
         request,
         query_set,
-        post_number=MAX_POST_ON_LIST) -> Paginator:
-
+        post_number=MAX_POST_ON_LIST,
+        count=None,
+        by_cursor=True):
+    """Страница ленты: по номеру (?page=) или по курсору (?cursor=)."""
+    cursor = request.GET.get('cursor')
+    if by_cursor and cursor is not None:
+        return CursorPaginator(query_set, post_number).get_page(cursor)
     paginator = Paginator(query_set, post_number)
+    if count is not None:
+        paginator.count = count
     page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+    page_obj = paginator.get_page(page_number)
+    page_obj.elided_page_range = list(elided_page_range(page_obj))
+    page_obj.next_cursor = None
+    if by_cursor and page_obj.number >= CURSOR_FROM_PAGE:
+        page_obj.next_cursor = next_page_cursor(page_obj)
+    return page_obj
+
 
+def index_state():
+    return PageState(None, None, [GLOBAL_SCOPE])
 
+
+@read_from_replica
+@cache_anonymous_page
+@conditional_page(index_state)
 def index(request):
     """Функция для рендера главной страницы"""
-    post_list = Post.objects.select_related('group').all()
+    depends_on(request, GLOBAL_SCOPE)
+    post_list = Post.objects.feed()
     page_obj = paginate(request, post_list)
+    prefetch_thumbnails(page_obj)
+    prefetch_card_versions(request, page_obj)
     context = {
         'page_obj': page_obj,
     }
     return render(request, 'posts/index.html', context)
 
 
+def group_state(slug):
+    group = get_object_or_404(Group, slug=slug)
+    return PageState(group, group.posts_count, [group_scope(group.pk)])
+
+
+@read_from_replica
+@cache_anonymous_page
+@conditional_page(group_state)
 def group_posts(request, slug):
     """Функция для рендера страницы с постами руппы"""
-    group = get_object_or_404(Group, slug=slug)
-    posts_list = group.posts.all()
-    page_obj = paginate(request, posts_list)
+    group = page_state(request, group_state, slug).object
+    depends_on(request, group_scope(group.pk))
+    posts_list = group.posts.feed()
+    page_obj = paginate(request, posts_list, count=group.posts_count)
+    prefetch_thumbnails(page_obj)
+    prefetch_card_versions(request, page_obj)
     context = {
         'group': group,
         'page_obj': page_obj
@@ -41,31 +84,98 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+def group_index(request):
+    """Функция для рендера списка групп по дате последней публикации"""
+    groups = Group.objects.order_by('-last_post_at', 'title')
+    page_obj = paginate(request, groups, by_cursor=False)
+    context = {
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/group_index.html', context)
+
+
+def profile_state(username):
+    user = get_object_or_404(
+        User.objects.select_related('post_stats'), username=username
+    )
+    return PageState(
+        user,
+        AuthorStats.for_author(user).posts_count,
+        [author_scope(user.pk), username_scope(user.username)],
+    )
+
+
+@read_from_replica
+@cache_anonymous_page
+@conditional_page(profile_state)
 def profile(request, username):
 
-    user = get_object_or_404(User, username=username)
-    posts = user.posts.all()
-    posts_count = user.posts.count()
-    page_obj = paginate(request, posts)
+    user = page_state(request, profile_state, username).object
+    depends_on(request, author_scope(user.pk), username_scope(user.username))
+    posts = user.posts.feed()
+    author_stats = AuthorStats.for_author(user)
+    page_obj = paginate(request, posts, count=author_stats.posts_count)
+    prefetch_thumbnails(page_obj)
+    prefetch_card_versions(request, page_obj)
     context = {
         'author': user,
-        'posts_count': posts_count,
+        'author_stats': author_stats,
+        'posts_count': author_stats.posts_count,
         'page_obj': page_obj,
     }
     return render(request, 'posts/profile.html', context)
 
 
+def post_state(post_id):
+    post = get_object_or_404(
+        Post.objects.feed().select_related('author__post_stats'),
+        id=post_id
+    )
+    return PageState(
+        post,
+        AuthorStats.for_author(post.author).posts_count,
+        [
+            post_scope(post.pk),
+            author_scope(post.author_id),
+            group_scope(post.group_id),
+        ],
+    )
+
+
+@read_from_replica
+@cache_anonymous_page
+@conditional_page(post_state)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    number_of_posts = post.author.posts.count()
+    state = page_state(request, post_state, post_id)
+    post = state.object
+    depends_on(request, *state.scopes)
+    prefetch_thumbnails([post])
 
     context = {
         'post': post,
-        'number_of_post': number_of_posts,
+        'number_of_post': state.count,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def search(request):
+    """Функция для рендера результатов поиска по тексту постов"""
+    query = request.GET.get('q', '').strip()
+    if not query:
+        results = Post.objects.none()
+    elif search_is_supported():
+        results = SearchResults(query)
+    else:
+        results = Post.objects.feed().filter(text__icontains=query)
+    page_obj = paginate(request, results, by_cursor=False)
+    prefetch_thumbnails(page_obj)
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def post_create(request):
 
@@ -78,6 +188,8 @@ def post_create(request):
     post = form.save(commit=False)
     post.author = request.user
     post.save()
+    if post.image:
+        schedule_thumbnails(post.image.name)
     username = request.user.username
     return redirect('posts:profile', username=username)
 
@@ -85,7 +197,7 @@ def post_create(request):
 @login_required
 def post_edit(request, post_id):
 
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(Post.objects.feed(), pk=post_id)
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
@@ -102,5 +214,7 @@ def post_edit(request, post_id):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        if post.image and 'image' in form.changed_data:
+            schedule_thumbnails(post.image.name)
         return redirect('posts:post_detail', post_id=post.pk)
     return redirect('posts:post_detail', post_id=post.pk)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -48,19 +49,22 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'posts.apps.PostsConfig',  # Добавлено приложение публикаций
     'users.apps.UsersConfig',  # Приложение для авторизации пользователей
-    'core',
+    'core.apps.CoreConfig',  # Общие шаблоны и настройка соединений
     'about',
     'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'core.timing.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.profiling.ProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'posts.routers.ReadYourWritesMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -74,7 +78,8 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates с замером времени отрисовки (Server-Timing)
+        'BACKEND': 'core.timing.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -99,9 +104,151 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Постоянные соединения: PRAGMA выполняются раз в минуту на поток,
+        # а не на каждый запрос
+        'CONN_MAX_AGE': 60,
+        # Тестовая база - тоже файл: в памяти SQLite разделяет её между
+        # потоками с блокировками таблиц вместо WAL и busy_timeout
+        'TEST': {
+            'NAME': os.path.join(BASE_DIR, 'test_db.sqlite3'),
+        },
     }
 }
 
+# PRAGMA для каждого нового соединения с SQLite (core.db). WAL не
+# блокирует читателей на время записи, busy_timeout (мс) заставляет
+# писателей ждать блокировку, а не падать с "database is locked".
+# cache_size < 0 - размер в КиБ
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+
+# Реплики только для чтения: алиасы из DATABASES, куда уходят чтения лент,
+# страниц постов и API. Пустой список - всё читается из default
+POSTS_READ_REPLICAS = []
+# Сколько секунд после записи клиент читает из default. Должно превышать
+# обычное отставание реплик
+POSTS_REPLICA_LAG = 10
+DATABASE_ROUTERS = ['posts.routers.PrimaryReplicaRouter']
+
+
+# Сессии в базе с замером времени загрузки (Server-Timing)
+SESSION_ENGINE = 'core.sessions'
+
+# Журнал доступа: строка JSON на запрос с временем фаз (core.timing).
+# По умолчанию пишется в консоль при DEBUG, как журналы самого Django;
+# путь в переменной окружения YATUBE_ACCESS_LOG включает запись в файл
+ACCESS_LOG_FILE = os.environ.get('YATUBE_ACCESS_LOG')
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'require_debug_true': {
+            '()': 'django.utils.log.RequireDebugTrue',
+        },
+    },
+    'formatters': {
+        'access': {'format': '%(asctime)s %(message)s'},
+    },
+    'handlers': {
+        'access': {
+            'class': 'logging.StreamHandler',
+            'filters': ['require_debug_true'],
+            'formatter': 'access',
+        },
+    },
+    'loggers': {
+        'core.access': {
+            'handlers': ['access'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+if ACCESS_LOG_FILE:
+    LOGGING['handlers']['access'] = {
+        'class': 'logging.FileHandler',
+        'filename': ACCESS_LOG_FILE,
+        'formatter': 'access',
+        'delay': True,
+    }
+
+# Профилирование запросов персонала по ?__profile=1 или X-Profile: 1
+# (core.profiling). Каталог профилей задаёт переменная окружения
+# YATUBE_PROFILER_DIR; без неё (None) middleware отключено полностью
+PROFILER_DIR = os.environ.get('YATUBE_PROFILER_DIR')
+# Интервал снятия стеков, секунд. Меньше sys.getswitchinterval()
+# (5 мс в CPython) ставить бессмысленно: поток профилировщика ждёт GIL,
+# который поток запроса отдаёт не чаще, и лишь замедляет запрос
+PROFILER_INTERVAL = 0.005
+# Не чаще одного профиля на сотрудника за столько секунд
+PROFILER_RATE_LIMIT = 10
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+
+# Кэш общий для всех процессов сервера: по поколениям в нём сбрасываются
+# страницы и считаются ETag и Last-Modified (posts.caching). С локальным
+# для процесса бэкендом (LocMemCache) валидаторы не отдаются. Каталог
+# задаёт переменная окружения YATUBE_CACHE_DIR
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get(
+            'YATUBE_CACHE_DIR',
+            os.path.join(tempfile.gettempdir(), 'yatube-cache'),
+        ),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    }
+}
+
+# Время жизни страниц лент в кэше для анонимных посетителей, секунд
+POSTS_PAGE_CACHE_TIMEOUT = 60 * 15
+
+# Сколько последних записей отдают Atom-ленты
+POSTS_FEED_SIZE = 50
+
+# Время жизни кэшированной разметки карточек постов, секунд.
+# Ключ меняется с updated_at поста и с версиями его автора и группы
+POSTS_FRAGMENT_CACHE_TIMEOUT = 60 * 60
+# Доля рендеров карточек, попадающих в статистику fragment_cache_stats
+POSTS_FRAGMENT_STATS_RATE = 0.01
+
+
+# Миниатюры картинок постов: (геометрия, опции sorl-thumbnail).
+# Должны совпадать с тегами {% thumbnail %} в шаблонах постов
+POSTS_THUMBNAIL_GEOMETRIES = [
+    ('960x339', {'crop': 'center', 'upscale': True}),
+]
+# Генерировать миниатюры в фоновом пуле после сохранения поста
+POSTS_THUMBNAIL_ASYNC = True
+POSTS_THUMBNAIL_WORKERS = 2
+# Сколько задач может ждать в очереди пула, остальные пропускаются
+POSTS_THUMBNAIL_QUEUE_SIZE = 100
+
+# Приём картинок постов: больше MAX_SIZE уменьшаются при загрузке,
+# больше MAX_PIXELS отклоняются до декодирования. MAX_PIXELS ограничивает
+# память на одну загрузку: до 4 байт на пиксель для PNG и других форматов
+# без уменьшенного декодирования
+POSTS_IMAGE_MAX_SIZE = (1920, 1920)
+POSTS_IMAGE_MAX_PIXELS = 50 * 1000 * 1000
+POSTS_IMAGE_QUALITY = 85
+
+# Бэкенд sorl-thumbnail с замером времени (Server-Timing)
+THUMBNAIL_BACKEND = 'posts.thumbnails.ThumbnailBackend'
+# Метаданные миниатюр: LRU в процессе -> общий кэш -> БД
+THUMBNAIL_KVSTORE = 'posts.kvstore.KVStore'
+# Сколько записей хранит LRU каждого процесса
+POSTS_THUMBNAIL_LRU_SIZE = 2000
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators